@@ -1,197 +1,93 @@
-import os
-import re
+import asyncio
+import hashlib
 from pathlib import Path
-from typing import List
-
-import httpx
-from dotenv import load_dotenv
-
-ENV_PATH = Path(__file__).with_name(".env")
-
-
-def _settings() -> dict[str, str]:
-    # Force .env values to override stale process env values.
-    load_dotenv(ENV_PATH, override=True)
-    return {
-        "openrouter_api_key": os.getenv("OPENROUTER_API_KEY", "").strip(),
-        "openrouter_model": os.getenv(
-            "OPENROUTER_MODEL", "meta-llama/llama-3.3-8b-instruct:free"
-        ).strip(),
-        "gemini_api_key": os.getenv("GEMINI_API_KEY", "").strip(),
-        "gemini_model": os.getenv("GEMINI_MODEL", "gemini-2.5-flash").strip(),
-        "app_url": os.getenv("APP_URL", "http://localhost:5173").strip(),
-        "site_name": os.getenv("SITE_NAME", "Portfolio AI").strip(),
-    }
-
-
-def _load_resume() -> str:
-    resume_path = Path(__file__).with_name("resume.md")
-    if not resume_path.exists():
-        return "Resume data not available."
-    return resume_path.read_text(encoding="utf-8")
-
-
-def _chunk_text(text: str, chunk_size: int = 220) -> List[str]:
-    words = text.split()
-    chunks = []
-    for i in range(0, len(words), chunk_size):
-        chunks.append(" ".join(words[i : i + chunk_size]))
-    return chunks or [text]
-
-
-def _simple_retrieve(question: str, resume_text: str, top_k: int = 2) -> str:
-    chunks = _chunk_text(resume_text)
-    question_terms = set(question.lower().split())
-
-    scored = []
-    for chunk in chunks:
-        chunk_terms = set(chunk.lower().split())
-        score = len(question_terms.intersection(chunk_terms))
-        scored.append((score, chunk))
-
-    scored.sort(key=lambda item: item[0], reverse=True)
-    selected = [chunk for _, chunk in scored[:top_k]]
-    return "\n\n".join(selected)
+from typing import AsyncIterator, List, Optional
+
+from conversation import ConversationStore, load_recent_turns, render_history
+from chunking import estimate_tokens
+from intent_router import route_intent
+from precomputed import precomputed_answers
+from profiles import ProfileRegistry
+from prompt_budget import compress_context, input_budget, output_budget, question_kind
+from providers import (
+    ProviderError,
+    admission,
+    ask_providers,
+    breakers,
+    has_openrouter_key,
+    model_availability,
+    stream_providers,
+)
+from response_cache import ResponseCache, SQLiteResponseStore, cache_key
+from scheduler import BACKGROUND_PRIORITY, admission_priority
+from semantic_cache import SemanticCache
+from singleflight import SingleFlight
+from tracing import RequestTrace, current_trace, request_trace, stage
+from resume_index import DEFAULT_PROFILE, ResumeIndex
+from settings import Settings, get_settings, settings_store
+
+# Bump when SYSTEM_PROMPT or the user prompt template changes so cached answers expire.
+PROMPT_VERSION = "2"
+SYSTEM_PROMPT = (
+    "You are a portfolio assistant. Answer using only the provided resume context. "
+    "If a detail is missing, say it is not listed in the resume. "
+    "Keep responses concise, accurate, and professional. "
+    "Use strengths-first language and frame improvement points positively (growth mindset), "
+    "without negative or damaging phrasing. "
+    "Never use the phrase 'beginner developer'."
+)
+
+_response_cache: Optional[ResponseCache] = None
+_semantic_cache: Optional[SemanticCache] = None
+_conversations: Optional[ConversationStore] = None
+_flights: Optional[SingleFlight] = None
+_profiles: Optional[ProfileRegistry] = None
+
+# Hand-written for the bundled resume; other profiles get these answered by the model instead.
+_CURATED_INTENTS = frozenset(
+    {"why_hire", "intro", "projects_pitch", "backend_strengths", "frontend_strengths", "softskills"}
+)
+
+
+def _backend_path(value: str) -> Optional[Path]:
+    if not value:
+        return None
+    path = Path(value)
+    return path if path.is_absolute() else Path(__file__).parent / path
+
+
+def _get_profiles(settings: Settings) -> ProfileRegistry:
+    global _profiles
+    config = (
+        _backend_path(settings.profiles_dir) or Path(__file__).parent / "profiles",
+        settings.profiles_max_loaded,
+        _backend_path(settings.profile_index_dir),
+    )
+    if _profiles is None or _profiles.config != config:
+        directory, max_loaded, index_dir = config
+        _profiles = ProfileRegistry(directory, max_loaded=max_loaded, index_dir=index_dir)
+    return _profiles
 
 
-def _is_technology_question(question: str) -> bool:
-    q = question.lower()
-    if "technology" in q or "technologies" in q or "tech stack" in q:
-        return True
-    if "strongest" in q and ("tech" in q or "technology" in q or "technologies" in q):
-        return True
-    # Keep this scoped to technical-skill intent, not soft-skill intent.
-    triggers = [
-        "technical skills",
-        "frameworks",
-        "languages",
-        "tools",
-        "frontend stack",
-        "backend stack",
-    ]
-    return any(t in q for t in triggers)
-
-
-def _is_backend_question(question: str) -> bool:
-    q = question.lower()
-    backend_terms = ["backend", "rest api", "api", "node.js", "express", "postgresql"]
-    intent_terms = ["what kind", "experience", "work", "done", "built"]
-    return any(b in q for b in backend_terms) and any(i in q for i in intent_terms)
-
-
-def _is_project_question(question: str) -> bool:
-    q = question.lower()
-    return "project" in q and any(
-        k in q for k in ["made", "build", "built", "created", "which", "what", "give", "name", "list"]
+def _resume_index(settings: Settings, profile: Optional[str] = None) -> ResumeIndex:
+    return _get_profiles(settings).get(
+        profile,
+        settings.chunk_max_tokens,
+        settings.chunk_overlap_tokens,
     )
 
 
-def _is_github_question(question: str) -> bool:
-    q = question.lower()
-    has_github = "github" in q or "git hub" in q
-    return has_github and any(k in q for k in ["url", "link", "profile", "id", "give"])
-
-
-def _is_softskills_question(question: str) -> bool:
-    q = question.lower()
-    soft_terms = [
-        "communication",
-        "leadership",
-        "soft skills",
-        "team collaboration",
-        "time management",
-        "critical thinking",
-        "adaptability",
-    ]
-    return any(term in q for term in soft_terms)
-
-
-def _is_why_hire_question(question: str) -> bool:
-    q = question.lower()
-    return "why hire" in q or "why should we hire" in q
-
-
-def _is_intro_question(question: str) -> bool:
-    q = question.lower()
-    triggers = ["tell me about yourself", "introduce yourself", "60 second intro", "self introduction"]
-    return any(t in q for t in triggers)
-
-
-def _is_projects_pitch_question(question: str) -> bool:
-    q = question.lower()
-    return ("projects" in q and "30" in q) or "projects in 30 sec" in q or "project pitch" in q
-
-
-def _is_backend_strengths_question(question: str) -> bool:
-    q = question.lower()
-    return "backend strengths" in q or ("backend" in q and "strength" in q)
-
-
-def _is_frontend_strengths_question(question: str) -> bool:
-    q = question.lower()
-    return "frontend strengths" in q or ("frontend" in q and "strength" in q)
-
-
-def _is_age_question(question: str) -> bool:
-    q = question.lower()
-    return "age" in q or "how old" in q
-
-
-def _is_contact_question(question: str) -> bool:
-    q = question.lower()
-    return any(k in q for k in ["contact", "email", "phone", "mobile", "linkedin", "linked in"])
-
-
-def _is_skills_projects_question(question: str) -> bool:
-    q = question.lower()
-    has_skills = any(k in q for k in ["technical skills", "skills", "tech stack", "languages"])
-    has_projects = any(k in q for k in ["major projects", "projects", "project name"])
-    return has_skills and has_projects
-
-
-def _extract_top_technologies(resume_text: str) -> List[tuple[str, int]]:
-    tech_aliases = {
-        "react": "React",
-        "react.js": "React",
-        "next.js": "Next.js",
-        "node.js": "Node.js",
-        "express.js": "Express.js",
-        "typescript": "TypeScript",
-        "javascript": "JavaScript",
-        "python": "Python",
-        "sql": "SQL",
-        "postgresql": "PostgreSQL",
-        "mongodb": "MongoDB",
-        "prisma": "Prisma",
-        "tailwind": "Tailwind CSS",
-        "tailwind css": "Tailwind CSS",
-        "hono": "Hono",
-        "cloudflare workers": "Cloudflare Workers",
-        "vercel": "Vercel",
-        "clerk": "Clerk",
-        "socket.io": "Socket.IO",
-        "langchain": "LangChain",
-        "huggingface": "HuggingFace",
-        "scikit-learn": "scikit-learn",
-        "mysql": "MySQL",
-        "git": "Git/GitHub",
-        "github": "Git/GitHub",
-    }
-    text = resume_text.lower()
-    scores: dict[str, int] = {}
+def warm_resume_index() -> ResumeIndex:
+    return _resume_index(get_settings())
 
-    for raw, canonical in tech_aliases.items():
-        pattern = r"\b" + re.escape(raw) + r"\b"
-        count = len(re.findall(pattern, text))
-        if count > 0:
-            scores[canonical] = scores.get(canonical, 0) + count
 
-    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
-    return ranked
+def _simple_retrieve(question: str, index: ResumeIndex, top_k: int = 2) -> str:
+    selected = [index.chunks[i].render() for i in index.retriever.top_k(question, top_k)]
+    return "\n\n".join(selected)
 
 
-def _build_technology_answer(resume_text: str) -> str:
-    ranked = _extract_top_technologies(resume_text)
+def _build_technology_answer(index: ResumeIndex) -> str:
+    ranked = index.technologies
     if not ranked:
         return "I could not detect specific technologies from the current resume text."
 
@@ -207,61 +103,18 @@ def _build_technology_answer(resume_text: str) -> str:
     )
 
 
-def _build_backend_answer(resume_text: str) -> str:
-    lines = resume_text.splitlines()
-    backend_points = []
-    keywords = [
-        "rest api",
-        "node.js",
-        "express",
-        "postgresql",
-        "prisma",
-        "cloudflare workers",
-        "authentication",
-        "server-side",
-        "database",
-        "mysql",
-        "socket.io",
-    ]
-
-    for line in lines:
-        line_clean = line.strip("- ").strip()
-        if not line_clean:
-            continue
-        low = line_clean.lower()
-        if any(k in low for k in keywords):
-            backend_points.append(line_clean)
-
-    # Preserve order while deduplicating and keep concise.
-    deduped = list(dict.fromkeys(backend_points))[:6]
+def _build_backend_answer(index: ResumeIndex) -> str:
+    deduped = index.backend_points[:6]
     if not deduped:
         return "Backend work is not clearly listed in the current resume text."
 
     bullets = "\n".join([f"- {p}" for p in deduped])
-    return f"Sunay's backend work includes:\n{bullets}"
-
-
-def _build_projects_answer(resume_text: str) -> str:
-    lines = [ln.strip() for ln in resume_text.splitlines()]
-    project_titles = []
-    project_links = []
-    capture = False
+    return f"{index.name}'s backend work includes:\n{bullets}"
 
-    for line in lines:
-        if line.lower().startswith("## major projects"):
-            capture = True
-            continue
-        if capture and line.startswith("## "):
-            break
-        if not capture:
-            continue
 
-        if line.startswith("### ") and ")" in line and " " in line:
-            title = line.split(")", 1)[-1].strip()
-            if title:
-                project_titles.append(title)
-        if "http://" in line or "https://" in line:
-            project_links.append(line.lstrip("- ").strip())
+def _build_projects_answer(index: ResumeIndex) -> str:
+    project_titles = index.project_titles
+    project_links = index.project_links
 
     if not project_titles:
         return "Specific project names are not clearly listed in the current profile."
@@ -269,19 +122,18 @@ def _build_projects_answer(resume_text: str) -> str:
     bullets = "\n".join([f"- {name}" for name in project_titles])
     link_lines = "\n".join([f"- {ln}" for ln in project_links[:5]])
     return (
-        "Projects Sunay has made:\n"
+        f"Projects {index.name} has made:\n"
         f"{bullets}\n\n"
         "Available project links:\n"
         f"{link_lines if link_lines else '- No links listed.'}"
     )
 
 
-def _build_github_answer(resume_text: str) -> str:
-    urls = re.findall(r"https?://github\.com/[A-Za-z0-9_.-]+(?:/[A-Za-z0-9_.-]+)?", resume_text)
-    if not urls:
+def _build_github_answer(index: ResumeIndex) -> str:
+    unique = index.github_urls
+    if not unique:
         return "GitHub URL is not listed in the current profile."
 
-    unique = list(dict.fromkeys(urls))
     profile = None
     repos = []
     for u in unique:
@@ -306,26 +158,9 @@ def _build_github_answer(resume_text: str) -> str:
     return "\n".join(lines)
 
 
-def _extract_section(resume_text: str, section_name: str) -> str:
-    lines = resume_text.splitlines()
-    capture = False
-    out: List[str] = []
-    target = f"## {section_name}".lower()
-    for line in lines:
-        if line.strip().lower() == target:
-            capture = True
-            out.append(line)
-            continue
-        if capture and line.startswith("## "):
-            break
-        if capture:
-            out.append(line)
-    return "\n".join(out).strip()
-
-
-def _build_skills_projects_answer(resume_text: str) -> str:
-    skills = _extract_section(resume_text, "Technical Skills")
-    projects = _extract_section(resume_text, "Major Projects")
+def _build_skills_projects_answer(index: ResumeIndex) -> str:
+    skills = index.section("Technical Skills")
+    projects = index.section("Major Projects")
     if not skills and not projects:
         return "Technical skills and major projects are not clearly listed in the profile."
     parts = []
@@ -336,7 +171,7 @@ def _build_skills_projects_answer(resume_text: str) -> str:
     return "\n\n".join(parts)
 
 
-def _build_softskills_answer(resume_text: str) -> str:
+def _build_softskills_answer() -> str:
     return (
         "Sunay's communication and leadership profile:\n"
         "- Communicates with honesty and clarity, especially when explaining real project work.\n"
@@ -401,182 +236,481 @@ def _build_frontend_strengths_answer() -> str:
     )
 
 
-def _build_age_answer(resume_text: str) -> str:
-    match = re.search(r"Age:\s*([^\n]+)", resume_text, flags=re.IGNORECASE)
-    if not match:
+def _build_age_answer(index: ResumeIndex) -> str:
+    if index.age is None:
         return "Age is not listed in the profile."
-    age_value = match.group(1).replace("(share only when asked)", "").strip()
-    return f"Sunay is {age_value}."
+    age_value = index.age.replace("(share only when asked)", "").strip()
+    return f"{index.name} is {age_value}."
 
 
-def _build_contact_answer(resume_text: str) -> str:
-    contact = _extract_section(resume_text, "Contact")
+def _build_contact_answer(index: ResumeIndex) -> str:
+    contact = index.contact
     if not contact:
         return "Contact details are not listed in the profile."
     return contact
 
 
-async def answer_resume_question(question: str) -> tuple[str, str]:
-    resume_text = _load_resume()
-    context = _simple_retrieve(question, resume_text)
-    settings = _settings()
-    openrouter_api_key = settings["openrouter_api_key"]
-    openrouter_model = settings["openrouter_model"]
-    gemini_api_key = settings["gemini_api_key"]
-    gemini_model = settings["gemini_model"]
-    app_url = settings["app_url"]
-    site_name = settings["site_name"]
-
-    system_prompt = (
-        "You are a portfolio assistant. Answer using only the provided resume context. "
-        "If a detail is missing, say it is not listed in the resume. "
-        "Keep responses concise, accurate, and professional. "
-        "Use strengths-first language and frame improvement points positively (growth mindset), "
-        "without negative or damaging phrasing. "
-        "Never use the phrase 'beginner developer'."
+_INTENT_HANDLERS = {
+    "age": (_build_age_answer, "deterministic-age-parser"),
+    "contact": (_build_contact_answer, "deterministic-contact-parser"),
+    "why_hire": (lambda _: _build_why_hire_answer(), "deterministic-why-hire-parser"),
+    "intro": (lambda _: _build_intro_answer(), "deterministic-intro-parser"),
+    "projects_pitch": (lambda _: _build_projects_pitch_answer(), "deterministic-project-pitch-parser"),
+    "backend_strengths": (
+        lambda _: _build_backend_strengths_answer(),
+        "deterministic-backend-strength-parser",
+    ),
+    "frontend_strengths": (
+        lambda _: _build_frontend_strengths_answer(),
+        "deterministic-frontend-strength-parser",
+    ),
+    "skills_projects": (_build_skills_projects_answer, "deterministic-skill-project-parser"),
+    "softskills": (lambda _: _build_softskills_answer(), "deterministic-softskills-parser"),
+    "technology": (_build_technology_answer, "deterministic-skill-parser"),
+    "backend": (_build_backend_answer, "deterministic-backend-parser"),
+    "project": (_build_projects_answer, "deterministic-project-parser"),
+    "github": (_build_github_answer, "deterministic-github-parser"),
+}
+
+
+def _configured_model(settings: Settings) -> str:
+    if has_openrouter_key(settings):
+        return settings.openrouter_model
+    if settings.gemini_api_key:
+        return settings.gemini_model
+    return "no-model"
+
+
+def provider_client_options() -> dict:
+    settings = get_settings()
+    return {
+        "max_connections": settings.provider_max_connections,
+        "max_keepalive_connections": settings.provider_max_keepalive,
+        "keepalive_expiry": settings.provider_keepalive_expiry,
+        "http2": settings.provider_http2,
+    }
+
+
+def _answer_version(settings: Settings) -> str:
+    return f"{_configured_model(settings)}:{PROMPT_VERSION}:{settings.answer_fingerprint}"
+
+
+def _semantic_namespace(index: ResumeIndex, settings: Settings) -> str:
+    return f"{index.digest}:{_answer_version(settings)}"
+
+
+def _precomputed(question: str, index: ResumeIndex, settings: Settings) -> Optional[tuple[str, str]]:
+    with stage("precomputed"):
+        return precomputed_answers.lookup(question, index.digest, _answer_version(settings))
+
+
+def _cache_key(question: str, index: ResumeIndex, settings: Settings) -> str:
+    return cache_key(
+        question, index.digest, _configured_model(settings), f"{PROMPT_VERSION}:{settings.answer_fingerprint}"
     )
 
-    user_prompt = (
+
+def _overflow_answer(question: str, index: ResumeIndex, settings: Settings) -> tuple[str, str]:
+    # Used when every model is over quota: answer from the resume itself instead of an error string.
+    context = _simple_retrieve(question, index, settings.retrieval_top_k)
+    if not context:
+        context = _build_intro_answer() if index.profile == DEFAULT_PROFILE else index.text
+    return (
+        "The AI models are at their request limit right now, so here is the most relevant part "
+        f"of the resume:\n\n{context}",
+        "deterministic-overflow-fallback",
+    )
+
+
+def _flight_key(key: str, history: str) -> str:
+    # Same question in different conversations must not share a call.
+    if not history:
+        return key
+    return f"{key}:{hashlib.sha256(history.encode('utf-8')).hexdigest()}"
+
+
+def _intent(question: str, index: ResumeIndex) -> Optional[str]:
+    intent = route_intent(question)
+    if intent in _CURATED_INTENTS and index.profile != DEFAULT_PROFILE:
+        return None
+    return intent
+
+
+def _local_answer(
+    question: str, index: ResumeIndex, settings: Settings, history: str = "", semantic: bool = True
+) -> Optional[tuple[str, str]]:
+    with stage("intent"):
+        intent = _intent(question, index)
+        if intent is not None:
+            builder, parser_name = _INTENT_HANDLERS[intent]
+            return (builder(index), parser_name)
+
+    # A cached answer to the same words may not fit this conversation.
+    if history or not semantic:
+        return None
+    semantic_cache = _get_semantic_cache(settings)
+    if semantic_cache is not None:
+        with stage("semantic_cache"):
+            hit = semantic_cache.lookup(question, _semantic_namespace(index, settings))
+        if hit is not None:
+            answer, model, _ = hit
+            return (answer, model)
+    return None
+
+
+def _remember_model_answer(
+    question: str, index: ResumeIndex, settings: Settings, result: tuple[str, str], history: str = ""
+) -> None:
+    if history:
+        return
+    semantic_cache = _get_semantic_cache(settings)
+    if semantic_cache is not None:
+        semantic_cache.store(question, result[0], result[1], _semantic_namespace(index, settings))
+
+
+def _render_user_prompt(context: str, question: str, history: str) -> str:
+    conversation = f"Conversation so far:\n{history}\n\n" if history else ""
+    return (
         f"Resume context:\n{context}\n\n"
+        f"{conversation}"
         f"User question: {question}\n\n"
         "Give a factual answer based only on context."
     )
 
-    if _is_age_question(question):
-        return (_build_age_answer(resume_text), "deterministic-age-parser")
-    if _is_contact_question(question):
-        return (_build_contact_answer(resume_text), "deterministic-contact-parser")
-    if _is_why_hire_question(question):
-        return (_build_why_hire_answer(), "deterministic-why-hire-parser")
-    if _is_intro_question(question):
-        return (_build_intro_answer(), "deterministic-intro-parser")
-    if _is_projects_pitch_question(question):
-        return (_build_projects_pitch_answer(), "deterministic-project-pitch-parser")
-    if _is_backend_strengths_question(question):
-        return (_build_backend_strengths_answer(), "deterministic-backend-strength-parser")
-    if _is_frontend_strengths_question(question):
-        return (_build_frontend_strengths_answer(), "deterministic-frontend-strength-parser")
-    if _is_skills_projects_question(question):
-        return (_build_skills_projects_answer(resume_text), "deterministic-skill-project-parser")
-    if _is_softskills_question(question):
-        return (_build_softskills_answer(resume_text), "deterministic-softskills-parser")
-    if _is_technology_question(question):
-        return (_build_technology_answer(resume_text), "deterministic-skill-parser")
-    if _is_backend_question(question):
-        return (_build_backend_answer(resume_text), "deterministic-backend-parser")
-    if _is_project_question(question):
-        return (_build_projects_answer(resume_text), "deterministic-project-parser")
-    if _is_github_question(question):
-        return (_build_github_answer(resume_text), "deterministic-github-parser")
-
-    if openrouter_api_key and openrouter_api_key.startswith("sk-or-v1-"):
-        headers = {
-            "Authorization": f"Bearer {openrouter_api_key}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": app_url,
-            "X-Title": site_name,
-        }
-
-        payload = {
-            "model": openrouter_model,
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            "temperature": 0.2,
-            "max_tokens": 900,
-        }
 
-        try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    "https://openrouter.ai/api/v1/chat/completions",
-                    headers=headers,
-                    json=payload,
-                )
-                if response.status_code == 401:
-                    return (
-                    "OpenRouter returned 401 Unauthorized. Check OPENROUTER_API_KEY or use GEMINI_API_KEY.",
-                        openrouter_model,
-                    )
-                response.raise_for_status()
-                data = response.json()
-        except httpx.HTTPError as exc:
-            return (f"OpenRouter request failed: {exc}", openrouter_model)
-
-        choices = data.get("choices", [])
-        if not choices:
-            return ("No response returned by model.", openrouter_model)
-
-        message = choices[0].get("message", {})
-        content = message.get("content", "No answer content.")
-        return (content.strip(), openrouter_model)
-
-    if gemini_api_key:
-        gemini_model_candidates = [
-            gemini_model,
-            "gemini-2.5-flash",
-            "gemini-2.0-flash",
-            "gemini-2.5-flash-lite",
-        ]
-        # Preserve order and remove duplicates.
-        gemini_model_candidates = list(dict.fromkeys(gemini_model_candidates))
-
-        gemini_payload = {
-            "contents": [{"role": "user", "parts": [{"text": user_prompt}]}],
-            "systemInstruction": {"parts": [{"text": system_prompt}]},
-            "generationConfig": {"temperature": 0.2, "maxOutputTokens": 900},
-        }
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            last_error = ""
-            for candidate_model in gemini_model_candidates:
-                gemini_url = (
-                    f"https://generativelanguage.googleapis.com/v1beta/models/{candidate_model}:generateContent"
-                )
-                try:
-                    response = await client.post(
-                        gemini_url,
-                        params={"key": gemini_api_key},
-                        headers={"Content-Type": "application/json"},
-                        json=gemini_payload,
-                    )
-                except httpx.HTTPError as exc:
-                    last_error = f"Gemini request failed: {exc}"
-                    continue
-
-                if response.status_code == 401:
-                    return (
-                        "Gemini returned 401 Unauthorized. Verify GEMINI_API_KEY in backend/.env and restart backend.",
-                        candidate_model,
-                    )
-                if response.status_code == 404:
-                    last_error = (
-                        f"Model '{candidate_model}' not found for Gemini API v1beta."
-                    )
-                    continue
-
-                try:
-                    response.raise_for_status()
-                    data = response.json()
-                except httpx.HTTPError as exc:
-                    last_error = f"Gemini request failed: {exc}"
-                    continue
-
-                candidates = data.get("candidates", [])
-                if not candidates:
-                    last_error = f"No response returned by Gemini model '{candidate_model}'."
-                    continue
-
-                parts = candidates[0].get("content", {}).get("parts", [])
-                text = " ".join([p.get("text", "") for p in parts]).strip()
-                return (text or "No answer content.", candidate_model)
-
-        return (
-            f"Gemini request failed for all configured models. Last error: {last_error}",
-            gemini_model,
+def _build_user_prompt(
+    question: str, index: ResumeIndex, settings: Settings, history: str = ""
+) -> tuple[str, int]:
+    chunks = [index.chunks[i] for i in index.retriever.top_k(question, settings.retrieval_top_k)]
+    budget = input_budget(_configured_model(settings), settings.prompt_input_budget_tokens)
+    fixed = estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(_render_user_prompt("", question, history))
+    context, before, after = compress_context(question, chunks, max(0, budget - fixed))
+    user_prompt = _render_user_prompt(context, question, history)
+    max_tokens = output_budget(question, settings.prompt_max_output_tokens)
+
+    trace = current_trace()
+    if trace is not None:
+        trace.question_kind = question_kind(question)
+        trace.max_tokens = max_tokens
+        trace.context_tokens_before = before
+        trace.context_tokens_after = after
+        trace.prompt_tokens_estimate = estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(user_prompt)
+    return user_prompt, max_tokens
+
+
+async def _generate_answer(
+    question: str, index: ResumeIndex, settings: Settings, history: str = "", semantic: bool = True
+) -> tuple[str, str]:
+    local = _local_answer(question, index, settings, history, semantic)
+    if local is not None:
+        return local
+
+    with stage("retrieval"):
+        user_prompt, max_tokens = _build_user_prompt(question, index, settings, history)
+    with stage("provider"):
+        result = await ask_providers(settings, SYSTEM_PROMPT, user_prompt, max_tokens)
+    _remember_model_answer(question, index, settings, result, history)
+    return result
+
+
+def _get_flights(settings: Settings) -> Optional[SingleFlight]:
+    global _flights
+    if not settings.coalesce_enabled:
+        return None
+    window_seconds = settings.coalesce_window_ms / 1000
+    if _flights is None or _flights.window_seconds != window_seconds:
+        _flights = SingleFlight(window_seconds=window_seconds)
+    return _flights
+
+
+def _get_conversations(settings: Settings) -> ConversationStore:
+    global _conversations
+    config = (settings.conversation_max_sessions, settings.conversation_max_turns)
+    if _conversations is None or _conversations.config != config:
+        max_sessions, max_turns = config
+        _conversations = ConversationStore(max_sessions=max_sessions, max_turns=max_turns)
+    return _conversations
+
+
+async def _conversation_history(session_id: Optional[str], settings: Settings) -> str:
+    if not session_id or settings.conversation_max_turns <= 0:
+        return ""
+    store = _get_conversations(settings)
+    turns = store.recent(session_id)
+    if turns is None:
+        # First sight of this session in this process (e.g. after a restart): warm the ring once.
+        turns = await asyncio.to_thread(load_recent_turns, session_id, settings.conversation_max_turns)
+        store.load(session_id, turns)
+    return render_history(turns, settings.conversation_history_tokens, settings.conversation_overflow_policy)
+
+
+def _remember_turn(session_id: Optional[str], settings: Settings, question: str, answer: str) -> None:
+    if session_id and settings.conversation_max_turns > 0:
+        _get_conversations(settings).append(session_id, question, answer)
+
+
+def _get_response_cache(settings: Settings) -> ResponseCache:
+    global _response_cache
+    config = (
+        settings.response_cache_size,
+        settings.response_cache_ttl_seconds,
+        settings.response_cache_persist,
+    )
+    if _response_cache is None or _response_cache.config != config:
+        max_entries, ttl_seconds, persist = config
+        _response_cache = ResponseCache(
+            max_entries=max_entries,
+            ttl_seconds=ttl_seconds,
+            store=SQLiteResponseStore() if persist else None,
         )
+    return _response_cache
 
-    return (
-        "No valid model key found. Set OPENROUTER_API_KEY (sk-or-v1-...) or GEMINI_API_KEY in backend/.env.",
-        "no-model",
+
+def _get_semantic_cache(settings: Settings) -> Optional[SemanticCache]:
+    global _semantic_cache
+    if not settings.semantic_cache_enabled or settings.semantic_cache_size < 1:
+        return None
+    config = (
+        settings.semantic_cache_size,
+        settings.semantic_cache_threshold,
+        settings.response_cache_ttl_seconds,
     )
+    if _semantic_cache is None or _semantic_cache.config != config:
+        capacity, threshold, ttl_seconds = config
+        _semantic_cache = SemanticCache(capacity=capacity, threshold=threshold, ttl_seconds=ttl_seconds)
+    return _semantic_cache
+
+
+def has_profile(profile: Optional[str]) -> bool:
+    return profile is None or _get_profiles(get_settings()).exists(profile)
+
+
+def profile_info() -> dict:
+    registry = _get_profiles(get_settings())
+    return {"profiles": registry.available(), **registry.stats()}
+
+
+def precomputed_namespace() -> tuple[str, str]:
+    settings = get_settings()
+    return (_resume_index(settings).digest, _answer_version(settings))
+
+
+def precomputed_stats() -> dict:
+    return precomputed_answers.stats()
+
+
+async def warm_answers(questions: List[str], concurrency: int = 2) -> dict:
+    settings = get_settings()
+    index = _resume_index(settings)
+    version = _answer_version(settings)
+    # Rows from an earlier run (e.g. before a redeploy) are served immediately; only gaps are computed.
+    loaded = await asyncio.to_thread(precomputed_answers.load, index.digest, version)
+    missing = [q for q in dict.fromkeys(questions) if not precomputed_answers.contains(q, index.digest, version)]
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    failed = 0
+
+    async def warm(question: str) -> None:
+        nonlocal failed
+        async with semaphore:
+            try:
+                # No semantic lookup: a paraphrase's answer must not become this question's permanent one.
+                answer, model = await _generate_answer(question, index, settings, semantic=False)
+            except ProviderError:
+                failed += 1
+                return
+            await asyncio.to_thread(precomputed_answers.store, index.digest, version, question, answer, model)
+
+    # Visitors' questions are admitted ahead of warm-up calls on a busy provider key.
+    with admission_priority(BACKGROUND_PRIORITY):
+        await asyncio.gather(*(warm(q) for q in missing))
+    pruned = 0 if failed else await asyncio.to_thread(precomputed_answers.prune, index.digest, version)
+    return {
+        "resume_digest": index.digest[:12],
+        "answer_version": version,
+        "loaded": loaded,
+        "computed": len(missing) - failed,
+        "failed": failed,
+        "pruned": pruned,
+    }
+
+
+def unavailable_models() -> list[dict]:
+    return model_availability.snapshot()
+
+
+def provider_health() -> list[dict]:
+    return breakers.snapshot()
+
+
+def scheduler_stats() -> list[dict]:
+    return admission.snapshot()
+
+
+def settings_info() -> dict:
+    return settings_store.snapshot()
+
+
+def semantic_cache_snapshot() -> dict:
+    if _semantic_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **_semantic_cache.snapshot()}
+
+
+def coalescing_stats() -> dict:
+    if _flights is None:
+        return {"enabled": False}
+    return {"enabled": True, **_flights.stats()}
+
+
+def conversation_stats() -> dict:
+    if _conversations is None:
+        return ConversationStore().stats()
+    return _conversations.stats()
+
+
+def response_cache_stats() -> dict:
+    if _response_cache is None:
+        return ResponseCache().stats()
+    return _response_cache.stats()
+
+
+async def answer_resume_question(
+    question: str, session_id: Optional[str] = None, profile: Optional[str] = None
+) -> tuple[str, str]:
+    with stage("settings"):
+        settings = get_settings()
+    with stage("resume"):
+        index = _resume_index(settings, profile)
+    with stage("history"):
+        history = await _conversation_history(session_id, settings)
+    # Answers that depend on earlier turns are never shared through the response cache.
+    cache = None if history else _get_response_cache(settings)
+    key = _cache_key(question, index, settings)
+
+    cached = None if history else _precomputed(question, index, settings)
+    if cached is None and cache is not None:
+        with stage("cache"):
+            cached = await cache.get(key)
+    if cached is not None:
+        _remember_turn(session_id, settings, question, cached[0])
+        return cached
+
+    async def generate() -> tuple[str, str]:
+        result = await _generate_answer(question, index, settings, history)
+        if cache is not None:
+            await cache.set(key, result)
+        return result
+
+    flights = _get_flights(settings)
+    try:
+        if flights is None:
+            result = await generate()
+        else:
+            # Concurrent identical questions share one provider call (and its failure).
+            result = await flights.do(_flight_key(key, history), generate)
+    except ProviderError as exc:
+        # Failures are returned to the caller but never cached.
+        if exc.rate_limited:
+            return _overflow_answer(question, index, settings)
+        return (str(exc), exc.model)
+
+    _remember_turn(session_id, settings, question, result[0])
+    return result
+
+
+async def answer_resume_batch(
+    questions: List[str], profile: Optional[str] = None, concurrency: int = 8
+) -> AsyncIterator[tuple[int, str, str, RequestTrace]]:
+    # Yields (position, answer, model, trace) as each answer is ready, not in question order.
+    index = _resume_index(get_settings(), profile)
+    pending = []
+    for i, question in enumerate(questions):
+        if _intent(question, index) is None:
+            pending.append(i)
+            continue
+        # Parser answers take microseconds: no point queueing them behind provider calls.
+        with request_trace() as trace:
+            answer, model = await answer_resume_question(question, profile=profile)
+        yield (i, answer, model, trace)
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def answer(i: int) -> tuple[int, str, str, RequestTrace]:
+        async with semaphore:
+            # One trace per question so token usage lands on the right row.
+            with request_trace() as trace:
+                result, model = await answer_resume_question(questions[i], profile=profile)
+        return (i, result, model, trace)
+
+    tasks = [asyncio.create_task(answer(i)) for i in pending]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def stream_resume_answer(
+    question: str, session_id: Optional[str] = None, profile: Optional[str] = None
+) -> AsyncIterator[dict]:
+    with stage("settings"):
+        settings = get_settings()
+    with stage("resume"):
+        index = _resume_index(settings, profile)
+    with stage("history"):
+        history = await _conversation_history(session_id, settings)
+    cache = None if history else _get_response_cache(settings)
+    key = _cache_key(question, index, settings)
+
+    ready = None if history else _precomputed(question, index, settings)
+    if ready is None and cache is not None:
+        with stage("cache"):
+            ready = await cache.get(key)
+    if ready is None:
+        ready = _local_answer(question, index, settings, history)
+        if ready is not None and cache is not None:
+            await cache.set(key, ready)
+    flights = _get_flights(settings)
+    in_flight = flights.join(_flight_key(key, history)) if ready is None and flights is not None else None
+    if in_flight is not None:
+        # A /api/chat call for the same question is already running: reuse it instead of streaming a duplicate.
+        try:
+            ready = await asyncio.shield(in_flight)
+        except ProviderError as exc:
+            if not exc.rate_limited:
+                yield {"event": "error", "data": {"message": str(exc), "model": exc.model}}
+                return
+            ready = _overflow_answer(question, index, settings)
+    if ready is not None:
+        # Cached and deterministic answers are complete already: one token event.
+        answer, model = ready
+        _remember_turn(session_id, settings, question, answer)
+        yield {"event": "token", "data": {"text": answer}}
+        yield {"event": "done", "data": {"answer": answer, "model": model}}
+        return
+
+    with stage("retrieval"):
+        user_prompt, max_tokens = _build_user_prompt(question, index, settings, history)
+    model = _configured_model(settings)
+    parts: list[str] = []
+    try:
+        with stage("provider"):
+            async for model, delta in stream_providers(settings, SYSTEM_PROMPT, user_prompt, max_tokens):
+                parts.append(delta)
+                yield {"event": "token", "data": {"text": delta}}
+    except ProviderError as exc:
+        if exc.rate_limited and not parts:
+            answer, model = _overflow_answer(question, index, settings)
+            yield {"event": "token", "data": {"text": answer}}
+            yield {"event": "done", "data": {"answer": answer, "model": model}}
+            return
+        yield {"event": "error", "data": {"message": str(exc), "model": exc.model}}
+        return
+
+    result = ("".join(parts).strip() or "No answer content.", model)
+    _remember_model_answer(question, index, settings, result, history)
+    if cache is not None:
+        await cache.set(key, result)
+    _remember_turn(session_id, settings, question, result[0])
+    yield {"event": "done", "data": {"answer": result[0], "model": result[1]}}
@@ -0,0 +1,172 @@
+import bisect
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from models import HourlyStat, LatencyStat, ModelStat, QuestionStat
+from precomputed import question_key
+from response_cache import normalize_question
+
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+OVERFLOW_BUCKET = -1
+MAX_QUESTION_CHARS = 500
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+@dataclass(frozen=True)
+class AnswerEvent:
+    question: str
+    model: str
+    latency_ms: int
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+
+
+def is_model_answer(model: str) -> bool:
+    return not model.startswith("deterministic-") and model != "no-model"
+
+
+def _bucket(latency_ms: int) -> int:
+    slot = bisect.bisect_left(LATENCY_BUCKETS_MS, latency_ms)
+    return LATENCY_BUCKETS_MS[slot] if slot < len(LATENCY_BUCKETS_MS) else OVERFLOW_BUCKET
+
+
+def apply_rollups(db: Session, events: Sequence[AnswerEvent]) -> None:
+    # Aggregate in memory first: a batch of N answers becomes one upsert per distinct key.
+    questions: dict[str, dict] = {}
+    models: dict[str, Counter] = defaultdict(Counter)
+    hours: Counter = Counter()
+    latency: Counter = Counter()
+    for event in events:
+        normalized = normalize_question(event.question)[:MAX_QUESTION_CHARS]
+        key = question_key(event.question)
+        row = questions.setdefault(
+            key,
+            {"question": normalized, "count": 0, "model_answers": 0, "first_seen": event.created_at},
+        )
+        row["count"] += 1
+        row["model_answers"] += int(is_model_answer(event.model))
+        row["last_model"] = event.model
+        row["last_seen"] = event.created_at
+
+        stats = models[event.model]
+        stats["count"] += 1
+        stats["prompt_tokens"] += event.prompt_tokens or 0
+        stats["completion_tokens"] += event.completion_tokens or 0
+        stats["latency_ms_total"] += event.latency_ms
+        hours[event.created_at.replace(minute=0, second=0, microsecond=0)] += 1
+        latency[(event.model, _bucket(event.latency_ms))] += 1
+
+    for key, row in questions.items():
+        stmt = insert(QuestionStat).values(question_key=key, **row)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[QuestionStat.question_key],
+                set_={
+                    "count": QuestionStat.count + stmt.excluded.count,
+                    "model_answers": QuestionStat.model_answers + stmt.excluded.model_answers,
+                    "last_model": stmt.excluded.last_model,
+                    "last_seen": stmt.excluded.last_seen,
+                },
+            )
+        )
+    for model, stats in models.items():
+        stmt = insert(ModelStat).values(model=model, **stats)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[ModelStat.model],
+                set_={name: getattr(ModelStat, name) + getattr(stmt.excluded, name) for name in stats},
+            )
+        )
+    for hour, count in hours.items():
+        stmt = insert(HourlyStat).values(hour=hour, count=count)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[HourlyStat.hour], set_={"count": HourlyStat.count + stmt.excluded.count}
+            )
+        )
+    for (model, le_ms), count in latency.items():
+        stmt = insert(LatencyStat).values(model=model, le_ms=le_ms, count=count)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[LatencyStat.model, LatencyStat.le_ms],
+                set_={"count": LatencyStat.count + stmt.excluded.count},
+            )
+        )
+
+
+def top_questions(db: Session, limit: int = DEFAULT_LIMIT, order: str = "count") -> list[dict]:
+    # "model_answers" ranks the questions that still cost a provider call: candidates for a parser or the FAQ.
+    column = QuestionStat.model_answers if order == "model_answers" else QuestionStat.count
+    rows = db.execute(select(QuestionStat).order_by(column.desc(), QuestionStat.last_seen.desc()).limit(limit))
+    return [
+        {
+            "question": row.question,
+            "count": row.count,
+            "model_answers": row.model_answers,
+            "last_model": row.last_model,
+            "first_seen": row.first_seen.isoformat(),
+            "last_seen": row.last_seen.isoformat(),
+        }
+        for row in rows.scalars()
+    ]
+
+
+def model_breakdown(db: Session) -> list[dict]:
+    rows = db.execute(select(ModelStat).order_by(ModelStat.count.desc())).scalars()
+    return [
+        {
+            "model": row.model,
+            "count": row.count,
+            "model_answer": is_model_answer(row.model),
+            "prompt_tokens": row.prompt_tokens,
+            "completion_tokens": row.completion_tokens,
+            "avg_latency_ms": round(row.latency_ms_total / row.count, 1) if row.count else 0.0,
+        }
+        for row in rows
+    ]
+
+
+def hourly_volume(db: Session, hours: int = 48) -> list[dict]:
+    since = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(hours=hours - 1)
+    rows = db.execute(select(HourlyStat).where(HourlyStat.hour >= since).order_by(HourlyStat.hour.asc()))
+    return [{"hour": row.hour.isoformat(), "count": row.count} for row in rows.scalars()]
+
+
+def _bucket_quantile(buckets: list[tuple[int, int]], total: int, q: float) -> Optional[int]:
+    # Upper bound of the bucket holding the q-th answer; None when it falls past the last bound.
+    target = q * total
+    seen = 0
+    for le_ms, count in buckets:
+        seen += count
+        if seen >= target:
+            return None if le_ms == OVERFLOW_BUCKET else le_ms
+    return None
+
+
+def latency_histogram(db: Session) -> list[dict]:
+    per_model: dict[str, list[tuple[int, int]]] = defaultdict(list)
+    for row in db.execute(select(LatencyStat)).scalars():
+        per_model[row.model].append((row.le_ms, row.count))
+    result = []
+    for model, buckets in sorted(per_model.items()):
+        buckets.sort(key=lambda item: (item[0] == OVERFLOW_BUCKET, item[0]))
+        total = sum(count for _, count in buckets)
+        result.append(
+            {
+                "model": model,
+                "count": total,
+                "buckets": [{"le_ms": "+Inf" if le == OVERFLOW_BUCKET else le, "count": c} for le, c in buckets],
+                "p50_le_ms": _bucket_quantile(buckets, total, 0.5),
+                "p95_le_ms": _bucket_quantile(buckets, total, 0.95),
+                "p99_le_ms": _bucket_quantile(buckets, total, 0.99),
+            }
+        )
+    return result
@@ -0,0 +1,123 @@
+# Compare the compiled intent router with the sequential _is_*_question chain.
+#
+#   cd backend && python -m benchmarks.intent_router
+import argparse
+import timeit
+from typing import Optional
+
+from intent_router import (
+    AGE_TERMS,
+    BACKEND_INTENT_TERMS,
+    BACKEND_TERMS,
+    CONTACT_TERMS,
+    GITHUB_DETAIL_TERMS,
+    GITHUB_TERMS,
+    INTRO_TERMS,
+    PROJECT_ACTION_TERMS,
+    PROJECTS_PITCH_TERMS,
+    PROJECTS_TERMS,
+    SKILLS_TERMS,
+    SOFT_SKILL_TERMS,
+    TECH_TERMS,
+    TECHNICAL_SKILL_TERMS,
+    TECHNOLOGY_TERMS,
+    WHY_HIRE_TERMS,
+    route_intent,
+)
+
+SAMPLE_QUESTIONS = [
+    "how old is he",
+    "give me contact details",
+    "why should we hire him",
+    "tell me about yourself",
+    "projects in 30 seconds",
+    "what are his backend strengths",
+    "frontend strength?",
+    "list his technical skills and major projects",
+    "how are his communication skills",
+    "which technologies is he strongest in",
+    "what's his tech stack",
+    "what kind of backend work has he done",
+    "what projects has he made",
+    "give github url",
+    "what languages does he know",
+    "does he have experience with AI agents",
+    "what is his education background",
+    "describe the movie recommendation system in detail please",
+    "where is he located and is he open to relocation for an internship",
+    "hello",
+]
+
+
+# The pre-router classifier chain: one lowercase and one set of substring scans per intent.
+LEGACY_CHECKS = [
+    ("age", lambda q: any(t in q for t in AGE_TERMS)),
+    ("contact", lambda q: any(t in q for t in CONTACT_TERMS)),
+    ("why_hire", lambda q: any(t in q for t in WHY_HIRE_TERMS)),
+    ("intro", lambda q: any(t in q for t in INTRO_TERMS)),
+    (
+        "projects_pitch",
+        lambda q: ("projects" in q and "30" in q) or any(t in q for t in PROJECTS_PITCH_TERMS),
+    ),
+    ("backend_strengths", lambda q: "backend strengths" in q or ("backend" in q and "strength" in q)),
+    ("frontend_strengths", lambda q: "frontend strengths" in q or ("frontend" in q and "strength" in q)),
+    (
+        "skills_projects",
+        lambda q: any(t in q for t in SKILLS_TERMS) and any(t in q for t in PROJECTS_TERMS),
+    ),
+    ("softskills", lambda q: any(t in q for t in SOFT_SKILL_TERMS)),
+    (
+        "technology",
+        lambda q: any(t in q for t in TECHNOLOGY_TERMS)
+        or ("strongest" in q and any(t in q for t in TECH_TERMS))
+        or any(t in q for t in TECHNICAL_SKILL_TERMS),
+    ),
+    (
+        "backend",
+        lambda q: any(t in q for t in BACKEND_TERMS) and any(t in q for t in BACKEND_INTENT_TERMS),
+    ),
+    ("project", lambda q: "project" in q and any(t in q for t in PROJECT_ACTION_TERMS)),
+    ("github", lambda q: any(t in q for t in GITHUB_TERMS) and any(t in q for t in GITHUB_DETAIL_TERMS)),
+]
+
+
+def legacy_route(question: str) -> Optional[str]:
+    for intent, check in LEGACY_CHECKS:
+        if check(question.lower()):
+            return intent
+    return None
+
+
+def _per_call_us(fn, questions, number: int) -> float:
+    total = timeit.timeit(lambda: [fn(q) for q in questions], number=number)
+    return total / (number * len(questions)) * 1e6
+
+
+def run(number: int = 2000) -> dict:
+    disagreements = [
+        {"question": q, "legacy": legacy_route(q), "router": route_intent(q)}
+        for q in SAMPLE_QUESTIONS
+        if legacy_route(q) != route_intent(q)
+    ]
+    return {
+        "questions": len(SAMPLE_QUESTIONS),
+        "legacy_us_per_question": round(_per_call_us(legacy_route, SAMPLE_QUESTIONS, number), 3),
+        "router_us_per_question": round(_per_call_us(route_intent, SAMPLE_QUESTIONS, number), 3),
+        "disagreements": disagreements,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Intent router vs legacy classifier chain")
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    result = run(args.number)
+    print(f"legacy chain: {result['legacy_us_per_question']:.2f} us/question")
+    print(f"router:       {result['router_us_per_question']:.2f} us/question")
+    for row in result["disagreements"]:
+        print(f"  differs: {row['question']!r}: legacy={row['legacy']} router={row['router']}")
+
+
+if __name__ == "__main__":
+    main()
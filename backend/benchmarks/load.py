@@ -0,0 +1,189 @@
+# Drive a running backend at a fixed concurrency and record throughput and latency percentiles.
+#
+#   cd backend && python -m benchmarks.load --base-url http://127.0.0.1:8000 --concurrency 50 --requests 500
+#
+# Start the backend against benchmarks.mock_provider (see that module) so results do not depend on
+# real provider quotas or network conditions.
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from typing import Optional
+
+import httpx
+
+from benchmarks.report import latency_summary, save_result
+
+# A mix of deterministic intents, retrieval-backed questions and near-duplicates.
+QUESTIONS = [
+    "how old is he",
+    "give me contact details",
+    "what's his tech stack",
+    "what projects has he made",
+    "is he open to relocation",
+    "what is his education background",
+    "explain how the movie recommendation system works",
+    "does he have experience with AI agents",
+    "which databases has he used in production",
+    "summarize his internship experience",
+    "what did he build with FastAPI",
+    "where is he located",
+]
+
+SCENARIOS = ("chat", "stream", "history", "mixed")
+
+
+async def _chat(client: httpx.AsyncClient, question: str, session_id: Optional[str]) -> dict:
+    response = await client.post("/api/chat", json={"question": question, "session_id": session_id})
+    response.raise_for_status()
+    return {"model": response.json().get("model", "")}
+
+
+async def _stream(client: httpx.AsyncClient, question: str, session_id: Optional[str]) -> dict:
+    started = time.perf_counter()
+    first_token: Optional[float] = None
+    model = ""
+    async with client.stream(
+        "POST", "/api/chat/stream", json={"question": question, "session_id": session_id}
+    ) as response:
+        response.raise_for_status()
+        event = ""
+        async for line in response.aiter_lines():
+            if line.startswith("event:"):
+                event = line[6:].strip()
+                if event == "token" and first_token is None:
+                    first_token = time.perf_counter() - started
+            elif line.startswith("data:") and event in ("done", "error"):
+                model = json.loads(line[5:]).get("model", "")
+    return {"model": model, "first_token": first_token}
+
+
+async def _history(client: httpx.AsyncClient, session_id: Optional[str]) -> dict:
+    params = {"limit": 50}
+    if session_id:
+        params["session_id"] = session_id
+    response = await client.get("/api/chat/history", params=params)
+    response.raise_for_status()
+    # Follow one page back, like a client scrolling up.
+    before = response.headers.get("X-Next-Before-Id")
+    if before:
+        response = await client.get("/api/chat/history", params={**params, "before_id": before})
+        response.raise_for_status()
+    return {}
+
+
+async def run(
+    base_url: str,
+    scenario: str = "chat",
+    concurrency: int = 20,
+    requests: int = 200,
+    sessions: int = 0,
+    timeout: float = 60.0,
+) -> dict:
+    kinds = {"mixed": ["chat", "chat", "stream", "history"]}.get(scenario, [scenario])
+    plan = list(zip(range(requests), itertools.cycle(kinds), itertools.cycle(QUESTIONS)))
+    latencies: dict[str, list[float]] = {kind: [] for kind in kinds}
+    first_tokens: list[float] = []
+    models: dict[str, int] = {}
+    errors: dict[str, int] = {}
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in plan:
+        queue.put_nowait(item)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+
+        async def worker() -> None:
+            while not queue.empty():
+                i, kind, question = queue.get_nowait()
+                session_id = f"bench-{i % sessions}" if sessions else None
+                started = time.perf_counter()
+                try:
+                    if kind == "chat":
+                        outcome = await _chat(client, question, session_id)
+                    elif kind == "stream":
+                        outcome = await _stream(client, question, session_id)
+                    else:
+                        outcome = await _history(client, session_id)
+                except httpx.HTTPError as exc:
+                    name = type(exc).__name__
+                    if isinstance(exc, httpx.HTTPStatusError):
+                        name = str(exc.response.status_code)
+                    errors[name] = errors.get(name, 0) + 1
+                    continue
+                latencies[kind].append(time.perf_counter() - started)
+                if outcome.get("first_token") is not None:
+                    first_tokens.append(outcome["first_token"])
+                if outcome.get("model"):
+                    models[outcome["model"]] = models.get(outcome["model"], 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    completed = sum(len(samples) for samples in latencies.values())
+    results = {
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(completed / elapsed, 2) if elapsed else 0.0,
+        "latency": {kind: latency_summary(samples) for kind, samples in latencies.items()},
+    }
+    if first_tokens:
+        results["time_to_first_token"] = latency_summary(first_tokens)
+    return {
+        "config": {
+            "base_url": base_url,
+            "scenario": scenario,
+            "concurrency": concurrency,
+            "requests": requests,
+            "sessions": sessions,
+        },
+        "results": results,
+        "completed": completed,
+        "errors": errors,
+        "models": models,
+    }
+
+
+async def _mock_stats(mock_url: str) -> Optional[dict]:
+    async with httpx.AsyncClient(timeout=5) as client:
+        try:
+            response = await client.get(f"{mock_url.rstrip('/')}/stats")
+            response.raise_for_status()
+        except httpx.HTTPError:
+            return None
+    return response.json()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the chat and history endpoints")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="chat")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--sessions", type=int, default=0, help="spread requests over N conversation sessions")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--mock-url", default=None, help="benchmarks.mock_provider URL to record its counters")
+    parser.add_argument("--output", default=None, help="JSON path (default: benchmarks/results/load-<time>.json)")
+    args = parser.parse_args()
+
+    result = asyncio.run(
+        run(args.base_url, args.scenario, args.concurrency, args.requests, args.sessions, args.timeout)
+    )
+    if args.mock_url:
+        result["mock_provider"] = asyncio.run(_mock_stats(args.mock_url))
+
+    results = result["results"]
+    print(f"{result['completed']}/{args.requests} ok in {results['elapsed_s']}s: {results['throughput_rps']} req/s")
+    for kind, summary in results["latency"].items():
+        print(f"  {kind:<8} p50={summary['p50_ms']}ms p95={summary['p95_ms']}ms p99={summary['p99_ms']}ms")
+    if "time_to_first_token" in results:
+        ttft = results["time_to_first_token"]
+        print(f"  ttft     p50={ttft['p50_ms']}ms p95={ttft['p95_ms']}ms p99={ttft['p99_ms']}ms")
+    if result["errors"]:
+        print(f"  errors: {result['errors']}")
+    print(f"saved {save_result('load', result, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
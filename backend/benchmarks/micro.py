@@ -0,0 +1,62 @@
+# Microbenchmarks for the CPU-bound pieces of the answer path.
+#
+#   cd backend && python -m benchmarks.micro --number 2000
+import argparse
+import timeit
+
+from ai_service import _simple_retrieve
+from benchmarks import intent_router
+from benchmarks.report import save_result
+from intent_router import route_intent
+from resume_index import RESUME_PATH, extract_top_technologies, get_resume_index
+
+
+def _per_call_us(fn, number: int) -> float:
+    return timeit.timeit(fn, number=number) / number * 1e6
+
+
+def run(number: int = 2000) -> dict:
+    index = get_resume_index()
+    resume_text = RESUME_PATH.read_text(encoding="utf-8")
+    questions = intent_router.SAMPLE_QUESTIONS
+
+    def retrieve_all():
+        for question in questions:
+            _simple_retrieve(question, index)
+
+    def route_all():
+        for question in questions:
+            route_intent(question)
+
+    def legacy_all():
+        for question in questions:
+            intent_router.legacy_route(question)
+
+    per_question = len(questions)
+    return {
+        "config": {"number": number, "questions": per_question},
+        "results": {
+            "simple_retrieve_us": round(_per_call_us(retrieve_all, max(1, number // 10)) / per_question, 3),
+            "route_intent_us": round(_per_call_us(route_all, number) / per_question, 3),
+            "legacy_intent_chain_us": round(_per_call_us(legacy_all, number) / per_question, 3),
+            "extract_top_technologies_us": round(
+                _per_call_us(lambda: extract_top_technologies(resume_text), max(1, number // 10)), 3
+            ),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Microbenchmarks for retrieval and intent routing")
+    parser.add_argument("--number", type=int, default=2000)
+    parser.add_argument("--output", default=None, help="JSON path (default: benchmarks/results/micro-<time>.json)")
+    args = parser.parse_args()
+
+    result = run(args.number)
+    for name, value in result["results"].items():
+        print(f"{name:<30} {value:>10.2f}")
+    print(f"saved {save_result('micro', result, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# Local stand-in for the OpenRouter and Gemini APIs, for load tests that must not touch real quotas.
+#
+#   cd backend && python -m benchmarks.mock_provider --port 8799 --latency-ms 300 --tokens-per-second 80
+#   OPENROUTER_BASE_URL=http://127.0.0.1:8799/api/v1 \
+#   GEMINI_BASE_URL=http://127.0.0.1:8799/v1beta uvicorn main:app --port 8000
+import argparse
+import asyncio
+import json
+import random
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from chunking import estimate_tokens
+
+ANSWER = (
+    "Sunay has built full-stack projects with React, FastAPI and PostgreSQL, including a movie "
+    "recommendation system and an AI portfolio assistant grounded in his resume."
+)
+
+
+@dataclass
+class MockOptions:
+    latency_ms: float = 200.0
+    jitter_ms: float = 50.0
+    tokens_per_second: float = 0.0
+    not_found_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    unauthorized_rate: float = 0.0
+    retry_after_seconds: int = 1
+    seed: Optional[int] = None
+
+
+class MockStats:
+    def __init__(self):
+        self.requests = 0
+        self.streams = 0
+        self.by_status: dict[str, int] = {}
+
+    def record(self, status: int, stream: bool) -> None:
+        self.requests += 1
+        self.streams += int(stream)
+        self.by_status[str(status)] = self.by_status.get(str(status), 0) + 1
+
+
+def _words(text: str, max_tokens: int) -> list[str]:
+    # Roughly one word per token; the cap mirrors what the real API does with max_tokens.
+    words = text.split(" ")
+    return [word + " " for word in words[: max(1, max_tokens)]]
+
+
+def create_app(options: MockOptions) -> FastAPI:
+    app = FastAPI(title="Mock LLM provider")
+    stats = MockStats()
+    rng = random.Random(options.seed)
+
+    def _failure(model: str) -> Optional[JSONResponse]:
+        roll = rng.random()
+        if roll < options.unauthorized_rate:
+            return JSONResponse({"error": {"code": 401, "message": "invalid key"}}, status_code=401)
+        roll -= options.unauthorized_rate
+        if roll < options.rate_limit_rate:
+            return JSONResponse(
+                {"error": {"code": 429, "message": "rate limited"}},
+                status_code=429,
+                headers={"Retry-After": str(options.retry_after_seconds)},
+            )
+        roll -= options.rate_limit_rate
+        if roll < options.not_found_rate:
+            return JSONResponse({"error": {"code": 404, "message": f"model {model} not found"}}, status_code=404)
+        return None
+
+    async def _first_byte_delay() -> None:
+        delay = options.latency_ms + rng.uniform(-options.jitter_ms, options.jitter_ms)
+        await asyncio.sleep(max(0.0, delay) / 1000)
+
+    async def _token_delay() -> None:
+        if options.tokens_per_second > 0:
+            await asyncio.sleep(1 / options.tokens_per_second)
+
+    def _sse(chunks: AsyncIterator[dict], terminator: bool = False) -> StreamingResponse:
+        async def body():
+            async for chunk in chunks:
+                yield f"data: {json.dumps(chunk)}\n\n"
+            if terminator:
+                # OpenRouter ends its streams with a literal [DONE]; Gemini just closes.
+                yield "data: [DONE]\n\n"
+
+        return StreamingResponse(body(), media_type="text/event-stream")
+
+    @app.post("/api/v1/chat/completions")
+    async def openrouter(request: Request):
+        payload = await request.json()
+        model = payload.get("model", "")
+        stream = bool(payload.get("stream"))
+        prompt = " ".join(m.get("content", "") for m in payload.get("messages", []))
+        words = _words(ANSWER, payload.get("max_tokens", 900))
+        usage = {"prompt_tokens": estimate_tokens(prompt), "completion_tokens": len(words)}
+
+        await _first_byte_delay()
+        failure = _failure(model)
+        if failure is not None:
+            stats.record(failure.status_code, stream)
+            return failure
+        stats.record(200, stream)
+
+        if not stream:
+            await asyncio.sleep(len(words) / options.tokens_per_second if options.tokens_per_second > 0 else 0)
+            return {"model": model, "choices": [{"message": {"content": "".join(words).strip()}}], "usage": usage}
+
+        async def chunks():
+            for word in words:
+                yield {"choices": [{"delta": {"content": word}}]}
+                await _token_delay()
+            yield {"choices": [], "usage": usage}
+
+        return _sse(chunks(), terminator=True)
+
+    async def _gemini(model: str, request: Request, stream: bool):
+        payload = await request.json()
+        prompt = " ".join(
+            part.get("text", "")
+            for content in payload.get("contents", [])
+            for part in content.get("parts", [])
+        )
+        max_tokens = payload.get("generationConfig", {}).get("maxOutputTokens", 900)
+        words = _words(ANSWER, max_tokens)
+        usage = {"promptTokenCount": estimate_tokens(prompt), "candidatesTokenCount": len(words)}
+
+        await _first_byte_delay()
+        failure = _failure(model)
+        if failure is not None:
+            stats.record(failure.status_code, stream)
+            return failure
+        stats.record(200, stream)
+
+        if not stream:
+            await asyncio.sleep(len(words) / options.tokens_per_second if options.tokens_per_second > 0 else 0)
+            text = "".join(words).strip()
+            return {"candidates": [{"content": {"parts": [{"text": text}]}}], "usageMetadata": usage}
+
+        async def chunks():
+            for i, word in enumerate(words):
+                chunk = {"candidates": [{"content": {"parts": [{"text": word}]}}]}
+                if i == len(words) - 1:
+                    chunk["usageMetadata"] = usage
+                yield chunk
+                await _token_delay()
+
+        return _sse(chunks())
+
+    @app.post("/v1beta/models/{model}:generateContent")
+    async def gemini(model: str, request: Request):
+        return await _gemini(model, request, stream=False)
+
+    @app.post("/v1beta/models/{model}:streamGenerateContent")
+    async def gemini_stream(model: str, request: Request):
+        return await _gemini(model, request, stream=True)
+
+    @app.get("/stats")
+    def mock_stats():
+        return {"options": asdict(options), "requests": stats.requests, "streams": stats.streams, "by_status": stats.by_status}
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Mock OpenRouter/Gemini API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="time to first byte")
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="0 sends the whole answer at once")
+    parser.add_argument("--not-found-rate", type=float, default=0.0, help="fraction of calls answered with 404")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of calls answered with 429")
+    parser.add_argument("--unauthorized-rate", type=float, default=0.0, help="fraction of calls answered with 401")
+    parser.add_argument("--retry-after-seconds", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    options = MockOptions(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        tokens_per_second=args.tokens_per_second,
+        not_found_rate=args.not_found_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        unauthorized_rate=args.unauthorized_rate,
+        retry_after_seconds=args.retry_after_seconds,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(options), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# Shared result handling for the benchmarks, plus a side-by-side diff of two saved runs.
+#
+#   cd backend && python -m benchmarks.report benchmarks/results/load-a.json benchmarks/results/load-b.json
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Optional, Sequence
+
+RESULTS_DIR = Path(__file__).with_name("results")
+
+
+def percentile(sorted_samples: Sequence[float], pct: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    # Nearest-rank, so p99 of 100 samples is the 99th value and never an interpolation.
+    rank = max(1, -(-len(sorted_samples) * pct // 100))
+    return sorted_samples[int(rank) - 1]
+
+
+def latency_summary(samples: Sequence[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5, check=True
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def environment() -> dict:
+    return {
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def save_result(name: str, result: dict, output: Optional[str] = None) -> Path:
+    path = Path(output) if output else RESULTS_DIR / f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"benchmark": name, "environment": environment(), **result}, indent=2))
+    return path
+
+
+def _flatten(value, prefix: str = "") -> dict[str, float]:
+    flat: dict[str, float] = {}
+    if isinstance(value, dict):
+        for key, item in value.items():
+            flat.update(_flatten(item, f"{prefix}.{key}" if prefix else key))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        flat[prefix] = float(value)
+    return flat
+
+
+def compare(before: dict, after: dict) -> list[tuple[str, float, float, Optional[float]]]:
+    old, new = _flatten(before.get("results", {})), _flatten(after.get("results", {}))
+    rows = []
+    for key in sorted(old.keys() & new.keys()):
+        change = (new[key] - old[key]) / old[key] * 100 if old[key] else None
+        rows.append((key, old[key], new[key], change))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare two saved benchmark runs")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args()
+
+    before = json.loads(Path(args.before).read_text())
+    after = json.loads(Path(args.after).read_text())
+    print(f"{before['environment'].get('commit')} -> {after['environment'].get('commit')}")
+    for key, old, new, change in compare(before, after):
+        delta = f"{change:+.1f}%" if change is not None else "n/a"
+        print(f"  {key:<48} {old:>12.2f} {new:>12.2f} {delta:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import math
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+DEFAULT_CHUNK_MAX_TOKENS = 200
+DEFAULT_CHUNK_OVERLAP_TOKENS = 30
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English prose and markdown.
+    return math.ceil(len(text) / 4)
+
+
+@dataclass(frozen=True)
+class Chunk:
+    text: str
+    section_path: tuple[str, ...] = ()
+
+    @property
+    def heading(self) -> str:
+        return " > ".join(self.section_path)
+
+    def render(self) -> str:
+        if not self.section_path:
+            return self.text
+        return f"[{self.heading}]\n{self.text}"
+
+
+@dataclass
+class _Section:
+    title: str
+    level: int
+    heading_line: Optional[str] = None
+    body: List[str] = field(default_factory=list)
+    children: List["_Section"] = field(default_factory=list)
+
+    def lines(self, with_heading: bool) -> List[str]:
+        out = [self.heading_line] if with_heading and self.heading_line else []
+        out.extend(self.body)
+        for child in self.children:
+            out.extend(child.lines(with_heading=True))
+        return out
+
+
+def _parse_sections(text: str) -> _Section:
+    root = _Section(title="", level=0)
+    stack = [root]
+    for line in text.splitlines():
+        match = _HEADING_RE.match(line)
+        if not match:
+            stack[-1].body.append(line)
+            continue
+        level = len(match.group(1))
+        while stack[-1].level >= level:
+            stack.pop()
+        section = _Section(title=match.group(2), level=level, heading_line=line)
+        stack[-1].children.append(section)
+        stack.append(section)
+    return root
+
+
+def _join(lines: List[str]) -> str:
+    return "\n".join(lines).strip()
+
+
+def _split_long_line(line: str, max_tokens: int) -> List[str]:
+    pieces: List[str] = []
+    current: List[str] = []
+    for word in line.split():
+        if current and estimate_tokens(" ".join(current + [word])) > max_tokens:
+            pieces.append(" ".join(current))
+            current = []
+        current.append(word)
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def _window_lines(lines: List[str], max_tokens: int, overlap_tokens: int) -> List[str]:
+    units: List[str] = []
+    for line in lines:
+        if not line.strip():
+            continue
+        if estimate_tokens(line) > max_tokens:
+            units.extend(_split_long_line(line, max_tokens))
+        else:
+            units.append(line)
+
+    windows: List[str] = []
+    current: List[str] = []
+    fresh = 0
+    for unit in units:
+        if fresh and estimate_tokens("\n".join(current + [unit])) > max_tokens:
+            windows.append(_join(current))
+            # Carry trailing lines forward so ideas cut at the boundary keep context.
+            carried: List[str] = []
+            for prev in reversed(current):
+                if estimate_tokens("\n".join([prev] + carried)) > overlap_tokens:
+                    break
+                carried.insert(0, prev)
+            current = carried
+            fresh = 0
+        current.append(unit)
+        fresh += 1
+    if fresh:
+        windows.append(_join(current))
+    return windows
+
+
+def _emit(section: _Section, path: tuple[str, ...], max_tokens: int, overlap_tokens: int, out: List[Chunk]) -> None:
+    whole = _join(section.lines(with_heading=False))
+    if not whole:
+        return
+    # Keep a section together when it fits so a project or topic is never split.
+    if estimate_tokens(whole) <= max_tokens:
+        out.append(Chunk(text=whole, section_path=path))
+        return
+
+    for text in _window_lines(section.body, max_tokens, overlap_tokens):
+        out.append(Chunk(text=text, section_path=path))
+    for child in section.children:
+        _emit(child, path + (child.title,), max_tokens, overlap_tokens, out)
+
+
+def chunk_markdown(
+    text: str,
+    max_tokens: int = DEFAULT_CHUNK_MAX_TOKENS,
+    overlap_tokens: int = DEFAULT_CHUNK_OVERLAP_TOKENS,
+) -> List[Chunk]:
+    max_tokens = max(1, max_tokens)
+    overlap_tokens = max(0, min(overlap_tokens, max_tokens // 2))
+    chunks: List[Chunk] = []
+    _emit(_parse_sections(text), (), max_tokens, overlap_tokens, chunks)
+    return chunks or [Chunk(text=text)]
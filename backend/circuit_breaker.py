@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+@dataclass
+class BreakerOptions:
+    window_seconds: float = 60.0
+    min_requests: int = 5
+    error_threshold: float = 0.5
+    open_seconds: float = 30.0
+    half_open_probes: int = 1
+    min_timeout: float = 5.0
+    max_timeout: float = 30.0
+    timeout_multiplier: float = 2.0
+    latency_samples: int = 100
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, options: BreakerOptions):
+        self.name = name
+        self.options = options
+        self.state = CLOSED
+        self._outcomes: deque[tuple[float, bool]] = deque()
+        self._latencies: deque[float] = deque(maxlen=options.latency_samples)
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    def _trim(self, now: float) -> None:
+        cutoff = now - self.options.window_seconds
+        while self._outcomes and self._outcomes[0][0] < cutoff:
+            self._outcomes.popleft()
+
+    def _refresh(self, now: float) -> None:
+        if self.state == OPEN and now - self._opened_at >= self.options.open_seconds:
+            self.state = HALF_OPEN
+            self._probes = 0
+
+    def _open(self, now: float) -> None:
+        self.state = OPEN
+        self._opened_at = now
+        self._outcomes.clear()
+
+    def available(self) -> bool:
+        with self._lock:
+            self._refresh(time.monotonic())
+            if self.state == OPEN:
+                return False
+            return self.state == CLOSED or self._probes < self.options.half_open_probes
+
+    def allow(self) -> bool:
+        with self._lock:
+            self._refresh(time.monotonic())
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and self._probes < self.options.half_open_probes:
+                self._probes += 1
+                return True
+            return False
+
+    def release(self) -> None:
+        # A probe that was cancelled (for example a hedging loser) proves nothing.
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes:
+                self._probes -= 1
+
+    def record_success(self, latency: Optional[float]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if latency is not None:
+                self._latencies.append(latency)
+            if self.state == HALF_OPEN:
+                self.state = CLOSED
+                self._outcomes.clear()
+            self._outcomes.append((now, True))
+            self._trim(now)
+
+    def record_failure(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._open(now)
+                return
+            self._outcomes.append((now, False))
+            self._trim(now)
+            total = len(self._outcomes)
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            if total >= self.options.min_requests and failures / total >= self.options.error_threshold:
+                self._open(now)
+
+    def p95_latency(self) -> Optional[float]:
+        samples = sorted(self._latencies)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+    def timeout(self) -> float:
+        p95 = self.p95_latency()
+        # Until there is enough history, fall back to the hard ceiling.
+        if p95 is None or len(self._latencies) < self.options.min_requests:
+            return self.options.max_timeout
+        adaptive = p95 * self.options.timeout_multiplier
+        return min(self.options.max_timeout, max(self.options.min_timeout, adaptive))
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            self._refresh(now)
+            self._trim(now)
+            total = len(self._outcomes)
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            state = self.state
+            retry_in = max(0.0, self.options.open_seconds - (now - self._opened_at)) if state == OPEN else 0.0
+        p95 = self.p95_latency()
+        return {
+            "name": self.name,
+            "state": state,
+            "requests_in_window": total,
+            "error_rate": round(failures / total, 3) if total else 0.0,
+            "p95_latency_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "timeout_seconds": round(self.timeout(), 2),
+            "retry_in_seconds": round(retry_in, 1),
+        }
+
+
+class BreakerRegistry:
+    def __init__(self, options: Optional[BreakerOptions] = None):
+        self.options = options or BreakerOptions()
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, options: BreakerOptions) -> None:
+        if options == self.options:
+            return
+        with self._lock:
+            self.options = options
+            for breaker in self._breakers.values():
+                breaker.options = options
+
+    def get(self, provider: str, model: str) -> CircuitBreaker:
+        name = f"{provider}:{model}"
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(name, CircuitBreaker(name, self.options))
+        return breaker
+
+    def snapshot(self) -> list[dict]:
+        return [breaker.snapshot() for breaker in list(self._breakers.values())]
@@ -0,0 +1,127 @@
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import List, Optional
+
+from sqlalchemy import select
+
+from chunking import estimate_tokens
+from database import SessionLocal
+from models import ChatMessage
+
+
+@dataclass(frozen=True)
+class Turn:
+    question: str
+    answer: str
+
+
+class ConversationStore:
+    def __init__(self, max_sessions: int = 1000, max_turns: int = 6):
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self.config = (max_sessions, max_turns)
+        self._sessions: OrderedDict[str, deque[Turn]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.evictions = 0
+
+    def _touch(self, session_id: str) -> deque[Turn]:
+        turns = self._sessions.get(session_id)
+        if turns is None:
+            turns = deque(maxlen=self.max_turns)
+            self._sessions[session_id] = turns
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+        self._sessions.move_to_end(session_id)
+        return turns
+
+    def recent(self, session_id: str) -> Optional[List[Turn]]:
+        # None means "not in memory", as opposed to a known session with no turns yet.
+        with self._lock:
+            turns = self._sessions.get(session_id)
+            if turns is None:
+                return None
+            self._sessions.move_to_end(session_id)
+            return list(turns)
+
+    def load(self, session_id: str, turns: List[Turn]) -> None:
+        with self._lock:
+            ring = self._touch(session_id)
+            ring.clear()
+            ring.extend(turns)
+            self.loads += 1
+
+    def append(self, session_id: str, question: str, answer: str) -> None:
+        with self._lock:
+            self._touch(session_id).append(Turn(question, answer))
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "max_turns": self.max_turns,
+            "loads": self.loads,
+            "evictions": self.evictions,
+        }
+
+
+def load_recent_turns(session_id: str, max_turns: int) -> List[Turn]:
+    # Bounded by the (session_id, id) index: at most two rows per turn, never a table scan.
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(ChatMessage.role, ChatMessage.content)
+            .where(ChatMessage.session_id == session_id)
+            .order_by(ChatMessage.id.desc())
+            .limit(max_turns * 2 + 1)
+        ).all()
+    turns = []
+    pending_answer = None
+    for role, content in rows:
+        if role == "assistant":
+            pending_answer = content
+        elif pending_answer is not None:
+            turns.append(Turn(content, pending_answer))
+            pending_answer = None
+    turns.reverse()
+    return turns[-max_turns:]
+
+
+def _turn_text(turn: Turn) -> str:
+    return f"User: {turn.question}\nAssistant: {turn.answer}"
+
+
+def render_history(turns: List[Turn], budget_tokens: int, policy: str = "summarize") -> str:
+    if not turns or budget_tokens <= 0:
+        return ""
+
+    kept: List[str] = []
+    used = 0
+    older = list(turns)
+    # Newest turns matter most for follow-ups, so fill the budget from the end.
+    while older:
+        text = _turn_text(older[-1])
+        cost = estimate_tokens(text)
+        if used + cost > budget_tokens:
+            if not kept:
+                # Even the last turn is too long: keep its head rather than nothing.
+                kept.append(text[: budget_tokens * 4].rstrip() + " ...")
+                older.pop()
+            break
+        kept.append(text)
+        used += cost
+        older.pop()
+    kept.reverse()
+
+    if older and policy == "summarize":
+        # Extractive summary: the earlier questions alone, oldest dropped first if space is short.
+        questions = [turn.question for turn in older]
+        while questions:
+            summary = "Earlier questions: " + "; ".join(questions)
+            if used + estimate_tokens(summary) <= budget_tokens:
+                kept.insert(0, summary)
+                break
+            questions.pop(0)
+
+    return "\n".join(kept)
@@ -1,16 +1,84 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 
+from settings import get_settings
+
 DATABASE_URL = "sqlite:///./portfolio.db"
 
+_settings = get_settings()
+
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"check_same_thread": False},
+    connect_args={"check_same_thread": False, "timeout": _settings.sqlite_busy_timeout_ms / 1000},
+    pool_size=_settings.db_pool_size,
+    max_overflow=_settings.db_max_overflow,
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+@event.listens_for(engine, "connect")
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # Only takes effect before the first table exists; older files are converted by the retention job.
+    cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    # WAL lets history reads run while the chat writer commits; NORMAL only fsyncs at checkpoints.
+    cursor.execute(f"PRAGMA journal_mode={_settings.sqlite_journal_mode}")
+    cursor.execute(f"PRAGMA synchronous={_settings.sqlite_synchronous}")
+    # Negative cache_size is in KiB rather than pages.
+    cursor.execute(f"PRAGMA cache_size=-{_settings.sqlite_cache_size_kb}")
+    cursor.execute(f"PRAGMA mmap_size={_settings.sqlite_mmap_size_mb * 1024 * 1024}")
+    cursor.execute(f"PRAGMA busy_timeout={_settings.sqlite_busy_timeout_ms}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def _add_column(table: str, column: str, ddl: str):
+    def migrate(conn) -> None:
+        # create_all already builds new databases with the column; only old files need the ALTER.
+        columns = {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+        if column not in columns:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+    return migrate
+
+
+# Applied in order to databases created before the matching model change; tracked in PRAGMA user_version.
+MIGRATIONS = [
+    (1, ["CREATE INDEX IF NOT EXISTS ix_chat_messages_created_at ON chat_messages (created_at)"]),
+    (
+        2,
+        [
+            _add_column("chat_messages", "session_id", "VARCHAR(64)"),
+            "CREATE INDEX IF NOT EXISTS ix_chat_messages_session_id ON chat_messages (session_id)",
+        ],
+    ),
+    (
+        3,
+        [
+            _add_column("chat_messages", "prompt_tokens", "INTEGER"),
+            _add_column("chat_messages", "completion_tokens", "INTEGER"),
+        ],
+    ),
+]
+
+
+def run_migrations() -> int:
+    with engine.begin() as conn:
+        current = conn.execute(text("PRAGMA user_version")).scalar_one()
+        for version, statements in MIGRATIONS:
+            if version <= current:
+                continue
+            for statement in statements:
+                if callable(statement):
+                    statement(conn)
+                else:
+                    conn.execute(text(statement))
+            conn.execute(text(f"PRAGMA user_version={version}"))
+            current = version
+    return current
+
+
 def get_db():
     db = SessionLocal()
     try:
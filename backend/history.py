@@ -0,0 +1,69 @@
+import json
+from typing import Iterator, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import ChatMessage
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+EXPORT_BATCH_SIZE = 500
+
+
+def _filtered(query, session_id: Optional[str]):
+    if session_id is not None:
+        query = query.where(ChatMessage.session_id == session_id)
+    return query
+
+
+def history_page(
+    db: Session, session_id: Optional[str], before_id: Optional[int], limit: int
+) -> tuple[list[ChatMessage], Optional[int]]:
+    query = _filtered(select(ChatMessage), session_id)
+    if before_id is not None:
+        query = query.where(ChatMessage.id < before_id)
+    # Newest page first by primary key, so the cost stays flat however deep the client pages.
+    rows = list(db.execute(query.order_by(ChatMessage.id.desc()).limit(limit)).scalars())
+    rows.reverse()
+    next_before_id = rows[0].id if len(rows) == limit else None
+    return rows, next_before_id
+
+
+EXPORT_COLUMNS = (
+    ChatMessage.id,
+    ChatMessage.role,
+    ChatMessage.content,
+    ChatMessage.created_at,
+    ChatMessage.session_id,
+    ChatMessage.prompt_tokens,
+    ChatMessage.completion_tokens,
+)
+
+
+def message_record(row) -> dict:
+    return {
+        "id": row.id,
+        "role": row.role,
+        "content": row.content,
+        "created_at": row.created_at.isoformat(),
+        "session_id": row.session_id,
+        "prompt_tokens": row.prompt_tokens,
+        "completion_tokens": row.completion_tokens,
+    }
+
+
+def iter_history_ndjson(session_id: Optional[str], batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    last_id = 0
+    while True:
+        # A short session per batch: no connection or snapshot is held while the client reads.
+        with SessionLocal() as db:
+            query = _filtered(select(*EXPORT_COLUMNS), session_id).where(ChatMessage.id > last_id)
+            rows = db.execute(query.order_by(ChatMessage.id.asc()).limit(batch_size)).all()
+        if not rows:
+            return
+        yield "".join(json.dumps(message_record(row)) + "\n" for row in rows)
+        last_id = rows[-1].id
+        if len(rows) < batch_size:
+            return
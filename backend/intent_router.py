@@ -0,0 +1,173 @@
+from collections import deque
+from typing import Iterable, List, Optional
+
+from retrieval import split_words
+
+AGE_TERMS = ("age", "how old")
+CONTACT_TERMS = ("contact", "email", "phone", "mobile", "linkedin", "linked in")
+WHY_HIRE_TERMS = ("why hire", "why should we hire")
+INTRO_TERMS = ("tell me about yourself", "introduce yourself", "60 second intro", "self introduction")
+PROJECTS_PITCH_TERMS = ("projects in 30 sec", "project pitch")
+SKILLS_TERMS = ("technical skills", "skills", "tech stack", "languages")
+PROJECTS_TERMS = ("major projects", "projects", "project name")
+SOFT_SKILL_TERMS = (
+    "communication",
+    "leadership",
+    "soft skills",
+    "team collaboration",
+    "time management",
+    "critical thinking",
+    "adaptability",
+)
+TECHNOLOGY_TERMS = ("technology", "technologies", "tech stack")
+TECH_TERMS = ("tech", "technology", "technologies")
+# Keep this scoped to technical-skill intent, not soft-skill intent.
+TECHNICAL_SKILL_TERMS = (
+    "technical skills",
+    "frameworks",
+    "languages",
+    "tools",
+    "frontend stack",
+    "backend stack",
+)
+BACKEND_TERMS = ("backend", "rest api", "api", "node.js", "express", "postgresql")
+BACKEND_INTENT_TERMS = ("what kind", "experience", "work", "done", "build", "built")
+PROJECT_ACTION_TERMS = ("made", "build", "built", "created", "which", "what", "give", "name", "list")
+GITHUB_TERMS = ("github", "git hub")
+GITHUB_DETAIL_TERMS = ("url", "link", "profile", "id", "give")
+
+# Each intent matches when any clause matches; a clause matches when every
+# one of its term groups has at least one phrase present. Order is priority.
+INTENT_RULES: tuple[tuple[str, tuple[tuple[tuple[str, ...], ...], ...]], ...] = (
+    ("age", ((AGE_TERMS,),)),
+    ("contact", ((CONTACT_TERMS,),)),
+    ("why_hire", ((WHY_HIRE_TERMS,),)),
+    ("intro", ((INTRO_TERMS,),)),
+    ("projects_pitch", ((("projects",), ("30",)), (PROJECTS_PITCH_TERMS,))),
+    ("backend_strengths", ((("backend strengths",),), (("backend",), ("strength",)))),
+    ("frontend_strengths", ((("frontend strengths",),), (("frontend",), ("strength",)))),
+    ("skills_projects", ((SKILLS_TERMS, PROJECTS_TERMS),)),
+    ("softskills", ((SOFT_SKILL_TERMS,),)),
+    ("technology", ((TECHNOLOGY_TERMS,), (("strongest",), TECH_TERMS), (TECHNICAL_SKILL_TERMS,))),
+    ("backend", ((BACKEND_TERMS, BACKEND_INTENT_TERMS),)),
+    ("project", ((("project",), PROJECT_ACTION_TERMS),)),
+    ("github", ((GITHUB_TERMS, GITHUB_DETAIL_TERMS),)),
+)
+
+
+def _normalize_token(token: str) -> str:
+    # Fold simple plurals so "project" also matches "projects".
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def _inflections(token: str) -> tuple[str, ...]:
+    if token.endswith("e"):
+        return (token + "s", token + "d", token[:-1] + "ing")
+    return (token + "s", token + "ed", token + "ing")
+
+
+def _phrase_key(phrase: str) -> tuple[str, ...]:
+    return tuple(_normalize_token(t) for t in split_words(phrase))
+
+
+# Aho-Corasick automaton over word tokens: every phrase is found in one pass.
+# Phrases are reported as a bit mask so rule evaluation is integer arithmetic.
+class PhraseMatcher:
+    def __init__(self, phrases: Iterable[str]):
+        self.phrase_bits: dict[str, int] = {}
+        goto: List[dict[str, int]] = [{}]
+        outputs: List[int] = [0]
+
+        for phrase in phrases:
+            bit = self.phrase_bits.setdefault(phrase, 1 << len(self.phrase_bits))
+            state = 0
+            for token in _phrase_key(phrase):
+                nxt = goto[state].get(token)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][token] = nxt
+                    goto.append({})
+                    outputs.append(0)
+                state = nxt
+            outputs[state] |= bit
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, nxt in goto[state].items():
+                queue.append(nxt)
+                fallback = fail[state]
+                while fallback and token not in goto[fallback]:
+                    fallback = fail[fallback]
+                target = goto[fallback].get(token, 0)
+                fail[nxt] = target if target != nxt else 0
+                outputs[nxt] |= outputs[fail[nxt]]
+
+        # Map raw words straight to automaton tokens; anything else resets the scan. Plural and
+        # -ing/-ed forms fold onto their stem, so "working on backend" still finds "work".
+        self._tokens: dict[str, str] = {}
+        for transitions in goto:
+            for token in transitions:
+                self._tokens[token] = token
+                for form in _inflections(token):
+                    self._tokens.setdefault(form, token)
+        self._goto = goto
+        self._fail = fail
+        self._out = outputs
+
+    def mask(self, phrases: Iterable[str]) -> int:
+        bits = 0
+        for phrase in phrases:
+            bits |= self.phrase_bits[phrase]
+        return bits
+
+    def find(self, text: str) -> int:
+        found = 0
+        state = 0
+        tokens, goto, fail, out = self._tokens, self._goto, self._fail, self._out
+        for word in split_words(text):
+            token = tokens.get(word)
+            if token is None:
+                state = 0
+                continue
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            found |= out[state]
+        return found
+
+
+class IntentRouter:
+    def __init__(self, rules=INTENT_RULES):
+        self.rules = rules
+        self.intents = tuple(name for name, _ in rules)
+        self._matcher = PhraseMatcher(
+            phrase for _, clauses in rules for clause in clauses for group in clause for phrase in group
+        )
+        self._compiled = [
+            (intent, [[self._matcher.mask(group) for group in clause] for clause in clauses])
+            for intent, clauses in rules
+        ]
+
+    def route(self, question: str) -> Optional[str]:
+        found = self._matcher.find(question)
+        if not found:
+            return None
+        for intent, clauses in self._compiled:
+            for groups in clauses:
+                for group in groups:
+                    if not found & group:
+                        break
+                else:
+                    return intent
+        return None
+
+
+_default_router = IntentRouter()
+
+
+def route_intent(question: str) -> Optional[str]:
+    return _default_router.route(question)
@@ -1,16 +1,85 @@
-from fastapi import Depends, FastAPI
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager, suppress
+
+from typing import AsyncIterator, Optional
+
+from fastapi import Depends, FastAPI, HTTPException, Path, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import select
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from sqlalchemy.orm import Session
 
-from ai_service import answer_resume_question
-from database import Base, engine, get_db
+from analytics import (
+    DEFAULT_LIMIT,
+    MAX_LIMIT,
+    AnswerEvent,
+    hourly_volume,
+    latency_histogram,
+    model_breakdown,
+    top_questions,
+)
+from ai_service import (
+    answer_resume_batch,
+    answer_resume_question,
+    coalescing_stats,
+    conversation_stats,
+    has_profile,
+    precomputed_stats,
+    profile_info,
+    provider_client_options,
+    provider_health,
+    response_cache_stats,
+    scheduler_stats,
+    semantic_cache_snapshot,
+    settings_info,
+    stream_resume_answer,
+    unavailable_models,
+    warm_resume_index,
+)
+from chunking import estimate_tokens
+from database import Base, engine, get_db, run_migrations
+from history import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, history_page, iter_history_ndjson
+from metrics import MetricsMiddleware, observe_answer, render_metrics
 from models import ChatMessage
-from schemas import ChatMessageOut, ChatRequest, ChatResponse
+from persistence import chat_writer, writer_options
+from profiles import UnknownProfile
+from providers import close_provider_client, open_provider_client
+from retention import archive_days, iter_archive_ndjson, retention_job
+from schemas import BatchAnswer, BatchChatRequest, BatchChatResponse, ChatMessageOut, ChatRequest, ChatResponse
+from settings import get_settings, settings_store
+from tracing import RequestTrace, current_trace, stage
+from warmup import warmup
 
 Base.metadata.create_all(bind=engine)
+run_migrations()
 
-app = FastAPI(title="Portfolio AI Backend", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the resume index once at startup; it is rebuilt only when resume.md changes.
+    warm_resume_index()
+    # One pooled client per process so provider calls reuse connections and TLS sessions.
+    await open_provider_client(**provider_client_options())
+    # .env is re-read only when its mtime changes or on SIGHUP, never per request.
+    settings_store.install_sighup_handler()
+    watcher = asyncio.create_task(settings_store.watch())
+    # Chat rows are written in batches off the event loop; stop() drains the queue.
+    await chat_writer.start(writer_options(get_settings()))
+    # FAQ answers are (re)computed in the background; requests are served meanwhile.
+    warmer = asyncio.create_task(warmup.watch())
+    # Old chat rows move into compressed day archives and freed pages go back to the OS.
+    janitor = asyncio.create_task(retention_job.watch())
+    yield
+    for task in (janitor, warmer, watcher):
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await chat_writer.stop()
+    await close_provider_client()
+
+
+app = FastAPI(title="Portfolio AI Backend", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,12 +87,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Next-Before-Id"],
 )
+# Outermost, so the whole request is timed and every handler sees the same trace.
+app.add_middleware(MetricsMiddleware, server_timing_enabled=get_settings().server_timing)
 
 
 @app.get("/health")
 def health_check():
-    return {"status": "ok"}
+    return {
+        "status": "ok",
+        "settings": settings_info(),
+        "providers": provider_health(),
+        "unavailable_models": unavailable_models(),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 
 @app.get("/")
@@ -31,20 +113,236 @@ def root():
     return {"message": "Portfolio AI backend is running", "health": "/health", "chat": "/api/chat"}
 
 
+def _assistant_message(answer: str, model: str, session_id: Optional[str], trace: RequestTrace) -> ChatMessage:
+    message = ChatMessage(role="assistant", content=answer, session_id=session_id)
+    # Only answers that went to a model carry token counts; cached and parser answers leave them empty.
+    if trace.prompt_tokens_estimate is not None and not model.startswith("deterministic-"):
+        message.prompt_tokens = trace.prompt_tokens or trace.prompt_tokens_estimate
+        message.completion_tokens = trace.completion_tokens or estimate_tokens(answer)
+    return message
+
+
+def _elapsed_ms(started: float) -> int:
+    return round((time.perf_counter() - started) * 1000)
+
+
+def _answer_event(question: str, model: str, message: ChatMessage, latency_ms: int) -> AnswerEvent:
+    return AnswerEvent(
+        question=question,
+        model=model,
+        latency_ms=latency_ms,
+        prompt_tokens=message.prompt_tokens,
+        completion_tokens=message.completion_tokens,
+    )
+
+
+def _require_profile(profile: Optional[str]) -> None:
+    if not has_profile(profile):
+        raise HTTPException(status_code=404, detail=f"Profile '{profile}' not found.")
+
+
 @app.post("/api/chat", response_model=ChatResponse)
-async def chat(payload: ChatRequest, db: Session = Depends(get_db)):
-    db.add(ChatMessage(role="user", content=payload.question))
-    db.commit()
+async def chat(payload: ChatRequest):
+    _require_profile(payload.profile)
+    trace = current_trace() or RequestTrace()
+    with stage("db"):
+        await chat_writer.record(ChatMessage(role="user", content=payload.question, session_id=payload.session_id))
 
-    answer, model = await answer_resume_question(payload.question)
+    started = time.perf_counter()
+    try:
+        answer, model = await answer_resume_question(payload.question, payload.session_id, payload.profile)
+    except UnknownProfile as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    trace.model = model
+    latency_ms = _elapsed_ms(started)
 
-    db.add(ChatMessage(role="assistant", content=answer))
-    db.commit()
+    message = _assistant_message(answer, model, payload.session_id, trace)
+    with stage("db"):
+        await chat_writer.record(message, events=[_answer_event(payload.question, model, message, latency_ms)])
 
     return ChatResponse(answer=answer, model=model)
 
 
+@app.post("/api/chat/batch", response_model=BatchChatResponse)
+async def chat_batch(payload: BatchChatRequest):
+    _require_profile(payload.profile)
+    settings = get_settings()
+    if len(payload.questions) > settings.batch_max_questions:
+        raise HTTPException(
+            status_code=422, detail=f"At most {settings.batch_max_questions} questions per batch."
+        )
+    # Answers are independent: the batch is a questionnaire, not a conversation, so no history is used.
+    answers = answer_resume_batch(payload.questions, payload.profile, settings.batch_concurrency)
+    started = time.perf_counter()
+
+    rows: dict[int, tuple[list[ChatMessage], AnswerEvent]] = {}
+
+    async def collect() -> AsyncIterator[BatchAnswer]:
+        try:
+            async for i, answer, model, trace in answers:
+                trace.model = model
+                observe_answer(trace)
+                question = payload.questions[i]
+                message = _assistant_message(answer, model, payload.session_id, trace)
+                # Latency is measured from the start of the batch: what the caller waited for this answer.
+                event = _answer_event(question, model, message, _elapsed_ms(started))
+                pair = [ChatMessage(role="user", content=question, session_id=payload.session_id), message]
+                if payload.stream:
+                    # Saved as each answer lands, so a client that disconnects mid-stream keeps what it was sent.
+                    with stage("db"):
+                        await chat_writer.record(*pair, events=[event])
+                else:
+                    rows[i] = (pair, event)
+                yield BatchAnswer(index=i, question=question, answer=answer, model=model)
+        except UnknownProfile as exc:
+            raise HTTPException(status_code=404, detail=str(exc)) from exc
+
+    if payload.stream:
+        return StreamingResponse(
+            (item.model_dump_json() + "\n" async for item in collect()),
+            media_type="application/x-ndjson",
+            headers={"X-Accel-Buffering": "no"},
+        )
+    ordered = sorted([item async for item in collect()], key=lambda item: item.index)
+    # The whole batch in one write and one transaction, in request order.
+    with stage("db"):
+        await chat_writer.record(
+            *(message for i in sorted(rows) for message in rows[i][0]),
+            events=[rows[i][1] for i in sorted(rows)],
+        )
+    return BatchChatResponse(results=ordered)
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/api/chat/stream")
+async def chat_stream(payload: ChatRequest):
+    _require_profile(payload.profile)
+    trace = current_trace() or RequestTrace()
+    with stage("db"):
+        await chat_writer.record(ChatMessage(role="user", content=payload.question, session_id=payload.session_id))
+
+    async def events():
+        answer, model = "", ""
+        started = time.perf_counter()
+        async for item in stream_resume_answer(payload.question, payload.session_id, payload.profile):
+            if item["event"] == "done":
+                answer, model = item["data"]["answer"], item["data"]["model"]
+            elif item["event"] == "error":
+                answer, model = item["data"]["message"], item["data"]["model"]
+            yield _sse(item["event"], item["data"])
+
+        trace.model = model
+        latency_ms = _elapsed_ms(started)
+        message = _assistant_message(answer, model, payload.session_id, trace)
+        with stage("db"):
+            await chat_writer.record(
+                message, events=[_answer_event(payload.question, model, message, latency_ms)]
+            )
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/analytics/questions")
+def analytics_questions(
+    limit: int = Query(default=DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    order: str = Query(default="count", pattern="^(count|model_answers)$"),
+    db: Session = Depends(get_db),
+):
+    return top_questions(db, limit, order)
+
+
+@app.get("/api/analytics/models")
+def analytics_models(db: Session = Depends(get_db)):
+    return model_breakdown(db)
+
+
+@app.get("/api/analytics/hourly")
+def analytics_hourly(hours: int = Query(default=48, ge=1, le=24 * 90), db: Session = Depends(get_db)):
+    return hourly_volume(db, hours)
+
+
+@app.get("/api/analytics/latency")
+def analytics_latency(db: Session = Depends(get_db)):
+    return latency_histogram(db)
+
+
+@app.get("/api/warmup/stats")
+def warmup_stats():
+    return {**warmup.stats(), "answers": precomputed_stats()}
+
+
+@app.get("/api/retention/stats")
+def retention_stats():
+    return retention_job.stats()
+
+
+@app.get("/api/profiles")
+def profiles():
+    return profile_info()
+
+
+@app.get("/api/persistence/stats")
+def persistence_stats():
+    return chat_writer.stats()
+
+
+@app.get("/api/scheduler/stats")
+def scheduler():
+    return scheduler_stats()
+
+
+@app.get("/api/coalescing/stats")
+def coalescing():
+    return coalescing_stats()
+
+
+@app.get("/api/conversations/stats")
+def conversations_stats():
+    return conversation_stats()
+
+
+@app.get("/api/cache/stats")
+def cache_stats():
+    return response_cache_stats()
+
+
+@app.get("/api/cache/semantic")
+def semantic_cache():
+    return semantic_cache_snapshot()
+
+
 @app.get("/api/chat/history", response_model=list[ChatMessageOut])
-def history(db: Session = Depends(get_db)):
-    result = db.execute(select(ChatMessage).order_by(ChatMessage.created_at.asc())).scalars()
-    return list(result)
+def history(
+    response: Response,
+    session_id: Optional[str] = None,
+    before_id: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    rows, next_before_id = history_page(db, session_id, before_id, limit)
+    if next_before_id is not None:
+        response.headers["X-Next-Before-Id"] = str(next_before_id)
+    return rows
+
+
+@app.get("/api/chat/history/export")
+def history_export(session_id: Optional[str] = None):
+    # A sync generator runs in the threadpool, so batch queries never block the event loop.
+    return StreamingResponse(iter_history_ndjson(session_id), media_type="application/x-ndjson")
+
+
+@app.get("/api/chat/archive")
+def archive(db: Session = Depends(get_db)):
+    return archive_days(db)
+
+
+@app.get("/api/chat/archive/{day}")
+def archive_export(day: str = Path(pattern=r"^\d{4}-\d{2}-\d{2}$"), session_id: Optional[str] = None):
+    return StreamingResponse(iter_archive_ndjson(day, session_id), media_type="application/x-ndjson")
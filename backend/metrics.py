@@ -0,0 +1,187 @@
+import bisect
+import threading
+import time
+from typing import Optional, Sequence
+
+from tracing import RequestTrace, request_trace
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: non-cumulative bucket counts (last slot is +Inf), sum, count.
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][slot] += 1
+            series[1][0] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    le = _labels(self.labelnames, key, 'le="%g"' % bound)
+                    lines.append(f"{self.name}_bucket{le} {cumulative}")
+                cumulative += counts[-1]
+                le = _labels(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total[0]:.6f}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+http_request_duration = REGISTRY.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency until the last body byte, by route template.",
+        ("method", "route", "status"),
+    )
+)
+chat_stage_duration = REGISTRY.register(
+    Histogram(
+        "chat_stage_duration_seconds",
+        "Time spent in each answer stage, labelled by the model string returned to the client.",
+        ("stage", "model"),
+    )
+)
+chat_answers = REGISTRY.register(
+    Counter("chat_answers_total", "Answers returned, by the model or parser that produced them.", ("model",))
+)
+provider_call_duration = REGISTRY.register(
+    Histogram(
+        "provider_call_duration_seconds",
+        "Single provider attempt latency (time to first token for streams).",
+        ("provider", "model", "outcome"),
+    )
+)
+chat_writer_flush_duration = REGISTRY.register(
+    Histogram("chat_writer_flush_seconds", "Write-behind batch commit latency.")
+)
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
+
+
+def observe_answer(trace: RequestTrace) -> None:
+    model = trace.model or "unknown"
+    chat_answers.inc(model=model)
+    for name, seconds in trace.stages.items():
+        chat_stage_duration.observe(seconds, stage=name, model=model)
+
+
+def server_timing(trace: RequestTrace, total: Optional[float] = None) -> str:
+    entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in trace.stages.items()]
+    if total is not None:
+        entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class MetricsMiddleware:
+    # Plain ASGI rather than BaseHTTPMiddleware so streamed responses are timed until their last chunk.
+    def __init__(self, app, server_timing_enabled: bool = False):
+        self.app = app
+        self.server_timing_enabled = server_timing_enabled
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = "500"
+
+        with request_trace() as trace:
+
+            async def timed_send(message):
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = str(message["status"])
+                    if self.server_timing_enabled and trace.stages:
+                        header = server_timing(trace, time.perf_counter() - started)
+                        headers = [*message.get("headers", []), (b"server-timing", header.encode())]
+                        message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, timed_send)
+            finally:
+                route = scope.get("route")
+                http_request_duration.observe(
+                    time.perf_counter() - started,
+                    method=scope["method"],
+                    route=getattr(route, "path", "unmatched"),
+                    status=status,
+                )
+                if trace.model is not None:
+                    observe_answer(trace)
@@ -1,6 +1,7 @@
 from datetime import datetime
+from typing import Optional
 
-from sqlalchemy import DateTime, Integer, String, Text
+from sqlalchemy import BigInteger, DateTime, Integer, LargeBinary, String, Text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from database import Base
@@ -13,5 +14,89 @@ class ChatMessage(Base):
     role: Mapped[str] = mapped_column(String(20), nullable=False)
     content: Mapped[str] = mapped_column(Text, nullable=False)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.utcnow, nullable=False
+        DateTime, default=datetime.utcnow, nullable=False, index=True
     )
+    # SQLite appends the rowid to every index, so this also serves (session_id, id) keyset scans.
+    session_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, index=True)
+    # Model answers only: provider-reported usage when available, otherwise the local estimate.
+    prompt_tokens: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    completion_tokens: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+
+
+class CachedResponse(Base):
+    __tablename__ = "response_cache"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    answer: Mapped[str] = mapped_column(Text, nullable=False)
+    model: Mapped[str] = mapped_column(String(120), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=False, index=True
+    )
+
+
+class PrecomputedAnswer(Base):
+    __tablename__ = "precomputed_answers"
+
+    # One set of answers per resume content and answer version (model, prompt, settings fingerprint).
+    resume_digest: Mapped[str] = mapped_column(String(64), primary_key=True)
+    answer_version: Mapped[str] = mapped_column(String(200), primary_key=True)
+    question_key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    question: Mapped[str] = mapped_column(Text, nullable=False)
+    answer: Mapped[str] = mapped_column(Text, nullable=False)
+    model: Mapped[str] = mapped_column(String(120), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ChatArchive(Base):
+    __tablename__ = "chat_archive"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # UTC day of the archived messages; a busy day spans several blobs.
+    day: Mapped[str] = mapped_column(String(10), nullable=False, index=True)
+    first_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    last_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    rows: Mapped[int] = mapped_column(Integer, nullable=False)
+    raw_bytes: Mapped[int] = mapped_column(Integer, nullable=False)
+    # zlib-compressed NDJSON in the /api/chat/history/export format.
+    blob: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+# Rollups maintained by the chat writer in the same transaction as the chat rows (see analytics.py).
+class QuestionStat(Base):
+    __tablename__ = "analytics_questions"
+
+    question_key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    question: Mapped[str] = mapped_column(Text, nullable=False)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Answers that came from a provider model (cached or not) rather than a deterministic parser.
+    model_answers: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_model: Mapped[str] = mapped_column(String(120), nullable=False)
+    first_seen: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    last_seen: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+
+
+class ModelStat(Base):
+    __tablename__ = "analytics_models"
+
+    model: Mapped[str] = mapped_column(String(120), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    prompt_tokens: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    completion_tokens: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    latency_ms_total: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
+class HourlyStat(Base):
+    __tablename__ = "analytics_hourly"
+
+    hour: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class LatencyStat(Base):
+    __tablename__ = "analytics_latency"
+
+    model: Mapped[str] = mapped_column(String(120), primary_key=True)
+    # Upper bound of the bucket in ms; LATENCY_BUCKETS_MS in analytics.py, -1 for anything slower.
+    le_ms: Mapped[int] = mapped_column(Integer, primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Sequence
+
+from analytics import AnswerEvent, apply_rollups
+from database import SessionLocal
+from metrics import chat_writer_flush_duration
+from models import ChatMessage
+from settings import Settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class WriterOptions:
+    # "write_behind" batches rows on a background task; "sync" commits each request in a worker thread.
+    mode: str = "write_behind"
+    # "buffered" returns once rows are queued; "commit" waits for the batch that contains them.
+    durability: str = "buffered"
+    flush_ms: float = 50.0
+    max_batch: int = 256
+    max_pending: int = 10000
+    # A failed batch is retried with exponential backoff before its rows are given up.
+    retries: int = 3
+    retry_backoff_ms: float = 100.0
+
+
+def writer_options(settings: Settings) -> WriterOptions:
+    return WriterOptions(
+        mode=settings.chat_persist_mode.lower(),
+        durability=settings.chat_persist_durability.lower(),
+        flush_ms=settings.chat_persist_flush_ms,
+        max_batch=settings.chat_persist_max_batch,
+        max_pending=settings.chat_persist_max_pending,
+        retries=settings.chat_persist_retries,
+        retry_backoff_ms=settings.chat_persist_retry_backoff_ms,
+    )
+
+
+class ChatWriter:
+    def __init__(self, session_factory=SessionLocal):
+        self._session_factory = session_factory
+        self.options = WriterOptions()
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.rows_written = 0
+        self.retried_batches = 0
+        self.failed_batches = 0
+        self.dropped_rows = 0
+        self.last_error: Optional[str] = None
+
+    def _write(self, messages: list[ChatMessage], events: list[AnswerEvent]) -> None:
+        with self._session_factory() as db:
+            try:
+                db.add_all(messages)
+                # Rollups commit with the rows they count, so reports never drift from chat_messages.
+                if events:
+                    apply_rollups(db, events)
+                db.commit()
+            except Exception:
+                # Rolling back returns the rows to the transient state; drop the ids the failed flush gave them
+                # so a retry inserts them afresh.
+                db.rollback()
+                for message in messages:
+                    message.id = None
+                raise
+
+    async def start(self, options: WriterOptions) -> None:
+        self.options = options
+        if options.mode == "write_behind" and self._task is None:
+            self._queue = asyncio.Queue(maxsize=options.max_pending)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        # Let the writer drain everything already queued before it exits.
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+        self._queue = None
+
+    async def record(self, *messages: ChatMessage, events: Sequence[AnswerEvent] = ()) -> None:
+        for message in messages:
+            # Stamp at request time so history order does not depend on when the batch lands.
+            message.created_at = message.created_at or datetime.utcnow()
+
+        if self._queue is None:
+            await asyncio.to_thread(self._write, list(messages), list(events))
+            return
+
+        done = asyncio.get_running_loop().create_future() if self.options.durability == "commit" else None
+        # A full queue applies backpressure instead of growing without bound.
+        await self._queue.put((list(messages), list(events), done))
+        if done is not None:
+            await done
+
+    async def _collect(self, first) -> tuple[list, bool]:
+        items = [first]
+        rows = len(first[0])
+        deadline = asyncio.get_running_loop().time() + self.options.flush_ms / 1000
+        while rows < self.options.max_batch:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is None:
+                return items, True
+            items.append(item)
+            rows += len(item[0])
+        return items, False
+
+    async def _write_batch(self, messages: list[ChatMessage], events: list[AnswerEvent]) -> None:
+        attempt = 0
+        while True:
+            try:
+                # One transaction and one fsync per batch, off the event loop.
+                await asyncio.to_thread(self._write, messages, events)
+                return
+            except Exception as exc:
+                if attempt >= self.options.retries:
+                    raise
+                self.retried_batches += 1
+                self.last_error = str(exc)
+            # Usually a locked or busy database: wait it out instead of losing rows the client was told are saved.
+            await asyncio.sleep(self.options.retry_backoff_ms / 1000 * 2**attempt)
+            attempt += 1
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                break
+            items, stopping = await self._collect(first)
+            messages = [message for rows, _, _ in items for message in rows]
+            events = [event for _, answers, _ in items for event in answers]
+            started = time.perf_counter()
+            try:
+                await self._write_batch(messages, events)
+            except Exception as exc:
+                self.failed_batches += 1
+                self.dropped_rows += len(messages)
+                self.last_error = str(exc)
+                logger.error(
+                    "Chat writer dropped %d rows after %d attempts: %s", len(messages), self.options.retries + 1, exc
+                )
+                for _, _, done in items:
+                    if done is not None and not done.done():
+                        done.set_exception(exc)
+                continue
+            chat_writer_flush_duration.observe(time.perf_counter() - started)
+            self.batches += 1
+            self.rows_written += len(messages)
+            for _, _, done in items:
+                if done is not None and not done.done():
+                    done.set_result(None)
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.options.mode if self._task is not None else "sync",
+            "durability": self.options.durability,
+            "flush_ms": self.options.flush_ms,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "rows_written": self.rows_written,
+            "avg_batch_rows": round(self.rows_written / self.batches, 2) if self.batches else 0.0,
+            "retried_batches": self.retried_batches,
+            "failed_batches": self.failed_batches,
+            "dropped_rows": self.dropped_rows,
+            "last_error": self.last_error,
+        }
+
+
+chat_writer = ChatWriter()
@@ -0,0 +1,100 @@
+import hashlib
+import threading
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import and_, delete, not_, select
+
+from database import SessionLocal
+from models import PrecomputedAnswer
+from response_cache import normalize_question
+
+
+def question_key(question: str) -> str:
+    return hashlib.sha256(normalize_question(question).encode("utf-8")).hexdigest()
+
+
+class PrecomputedAnswers:
+    def __init__(self, session_factory=SessionLocal):
+        self._session_factory = session_factory
+        # Only the live (digest, version) set is held in memory, so lookups never touch SQLite.
+        self._namespace: Optional[tuple[str, str]] = None
+        self._answers: dict[str, tuple[str, str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, question: str, resume_digest: str, answer_version: str) -> Optional[tuple[str, str]]:
+        if self._namespace != (resume_digest, answer_version):
+            return None
+        value = self._answers.get(question_key(question))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def contains(self, question: str, resume_digest: str, answer_version: str) -> bool:
+        return self._namespace == (resume_digest, answer_version) and question_key(question) in self._answers
+
+    def load(self, resume_digest: str, answer_version: str) -> int:
+        with self._session_factory() as db:
+            rows = db.execute(
+                select(PrecomputedAnswer.question_key, PrecomputedAnswer.answer, PrecomputedAnswer.model).where(
+                    PrecomputedAnswer.resume_digest == resume_digest,
+                    PrecomputedAnswer.answer_version == answer_version,
+                )
+            ).all()
+        with self._lock:
+            self._namespace = (resume_digest, answer_version)
+            self._answers = {key: (answer, model) for key, answer, model in rows}
+        return len(rows)
+
+    def store(self, resume_digest: str, answer_version: str, question: str, answer: str, model: str) -> None:
+        key = question_key(question)
+        with self._session_factory() as db:
+            db.merge(
+                PrecomputedAnswer(
+                    resume_digest=resume_digest,
+                    answer_version=answer_version,
+                    question_key=key,
+                    question=question,
+                    answer=answer,
+                    model=model,
+                    created_at=datetime.utcnow(),
+                )
+            )
+            db.commit()
+        with self._lock:
+            if self._namespace == (resume_digest, answer_version):
+                self._answers[key] = (answer, model)
+
+    def prune(self, resume_digest: str, answer_version: str) -> int:
+        # Answers for an older resume or prompt can never be served again.
+        with self._session_factory() as db:
+            result = db.execute(
+                delete(PrecomputedAnswer).where(
+                    not_(
+                        and_(
+                            PrecomputedAnswer.resume_digest == resume_digest,
+                            PrecomputedAnswer.answer_version == answer_version,
+                        )
+                    )
+                )
+            )
+            db.commit()
+        return result.rowcount or 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "resume_digest": self._namespace[0][:12] if self._namespace else None,
+            "answer_version": self._namespace[1] if self._namespace else None,
+            "entries": len(self._answers),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+precomputed_answers = PrecomputedAnswers()
@@ -0,0 +1,103 @@
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional
+
+from chunking import DEFAULT_CHUNK_MAX_TOKENS, DEFAULT_CHUNK_OVERLAP_TOKENS
+from resume_index import DEFAULT_PROFILE, RESUME_PATH, ResumeIndex, ResumeIndexLoader
+
+# Profile ids double as file names and index directory names.
+PROFILE_ID_PATTERN = r"^[a-z0-9][a-z0-9_-]{0,63}$"
+_PROFILE_ID_RE = re.compile(PROFILE_ID_PATTERN)
+
+
+class UnknownProfile(Exception):
+    pass
+
+
+class ProfileRegistry:
+    def __init__(self, directory: Path, max_loaded: int = 32, index_dir: Optional[Path] = None):
+        self.directory = directory
+        self.max_loaded = max(1, max_loaded)
+        self.index_dir = index_dir
+        self.config = (directory, max_loaded, index_dir)
+        self._loaders: OrderedDict[str, ResumeIndexLoader] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def path(self, profile: str) -> Path:
+        # The bundled resume.md stays the default so single-portfolio deployments need no profiles/ dir.
+        if profile == DEFAULT_PROFILE:
+            return RESUME_PATH
+        if not _PROFILE_ID_RE.match(profile):
+            raise UnknownProfile(f"Invalid profile id '{profile}'.")
+        path = self.directory / f"{profile}.md"
+        if not path.is_file():
+            raise UnknownProfile(f"Profile '{profile}' not found.")
+        return path
+
+    def exists(self, profile: str) -> bool:
+        try:
+            self.path(profile)
+        except UnknownProfile:
+            return False
+        return True
+
+    def _loader(self, profile: str) -> ResumeIndexLoader:
+        with self._lock:
+            loader = self._loaders.get(profile)
+            if loader is not None:
+                self._loaders.move_to_end(profile)
+                self.hits += 1
+                return loader
+        path = self.path(profile)
+        index_dir = self.index_dir / profile if self.index_dir is not None else None
+        with self._lock:
+            loader = self._loaders.get(profile)
+            if loader is None:
+                loader = self._loaders[profile] = ResumeIndexLoader(path, profile, index_dir)
+                self.loads += 1
+                while len(self._loaders) > self.max_loaded:
+                    # Dropping the loader drops its index and unmaps its postings.
+                    self._loaders.popitem(last=False)
+                    self.evictions += 1
+            self._loaders.move_to_end(profile)
+            return loader
+
+    def get(
+        self,
+        profile: Optional[str] = None,
+        chunk_max_tokens: int = DEFAULT_CHUNK_MAX_TOKENS,
+        chunk_overlap_tokens: int = DEFAULT_CHUNK_OVERLAP_TOKENS,
+    ) -> ResumeIndex:
+        profile = profile or DEFAULT_PROFILE
+        loader = self._loader(profile)
+        if profile != DEFAULT_PROFILE and not loader.path.is_file():
+            # Deleted since it was loaded: forget it rather than serve the stale index.
+            with self._lock:
+                self._loaders.pop(profile, None)
+            raise UnknownProfile(f"Profile '{profile}' not found.")
+        return loader.get(chunk_max_tokens, chunk_overlap_tokens)
+
+    def available(self) -> List[str]:
+        found = []
+        if self.directory.is_dir():
+            found = sorted(p.stem for p in self.directory.glob("*.md") if _PROFILE_ID_RE.match(p.stem))
+        return [DEFAULT_PROFILE, *(p for p in found if p != DEFAULT_PROFILE)]
+
+    def stats(self) -> dict:
+        with self._lock:
+            loaded = list(self._loaders)
+        return {
+            "directory": str(self.directory),
+            "index_dir": str(self.index_dir) if self.index_dir is not None else None,
+            "loaded": len(loaded),
+            "max_loaded": self.max_loaded,
+            "hot": list(reversed(loaded)),
+            "hits": self.hits,
+            "loads": self.loads,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,102 @@
+import re
+from dataclasses import dataclass
+from typing import List, Sequence
+
+from chunking import Chunk, estimate_tokens
+from retrieval import tokenize
+
+# Input budget (system + user prompt) per model family; the longest matching prefix wins.
+MODEL_INPUT_BUDGETS = {
+    "meta-llama/": 1200,
+    "gemini-": 2000,
+}
+
+# Output caps by the shape of the question: a yes/no or single fact needs far less than a walkthrough.
+OUTPUT_BUDGETS = {
+    "factual": 200,
+    "summary": 400,
+    "detailed": 700,
+}
+
+_FACTUAL_PREFIXES = (
+    "who", "when", "where", "which", "is ", "are ", "does", "did", "has", "have", "can", "how many", "how long",
+)
+_DETAILED_TERMS = ("explain", "describe", "detail", "compare", "walk me through", "how does", "how did", "why")
+
+# Bullet lines are the natural unit in the resume; long prose lines are split at sentence ends.
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9])")
+
+
+@dataclass
+class _Unit:
+    chunk: int
+    position: int
+    text: str
+    score: float
+    tokens: int
+
+
+def question_kind(question: str) -> str:
+    q = question.lower().strip()
+    if any(term in q for term in _DETAILED_TERMS):
+        return "detailed"
+    if q.startswith(_FACTUAL_PREFIXES) or len(q.split()) <= 4:
+        return "factual"
+    return "summary"
+
+
+def output_budget(question: str, ceiling: int) -> int:
+    return min(OUTPUT_BUDGETS[question_kind(question)], ceiling)
+
+
+def input_budget(model: str, default: int) -> int:
+    matches = [prefix for prefix in MODEL_INPUT_BUDGETS if model.startswith(prefix)]
+    if not matches:
+        return default
+    return MODEL_INPUT_BUDGETS[max(matches, key=len)]
+
+
+def _units(question_terms: set[str], chunks: Sequence[Chunk]) -> List[_Unit]:
+    units = []
+    for rank, chunk in enumerate(chunks):
+        position = 0
+        for line in chunk.text.splitlines():
+            for sentence in _SENTENCE_END_RE.split(line):
+                if not sentence.strip():
+                    continue
+                overlap = len(question_terms & set(tokenize(sentence)))
+                # Ties go to the better-ranked chunk.
+                score = overlap + (0.5 if rank == 0 else 0.0)
+                units.append(_Unit(rank, position, sentence, score, estimate_tokens(sentence) + 1))
+                position += 1
+    return units
+
+
+def compress_context(question: str, chunks: Sequence[Chunk], budget_tokens: int) -> tuple[str, int, int]:
+    rendered = "\n\n".join(chunk.render() for chunk in chunks)
+    before = estimate_tokens(rendered)
+    if before <= budget_tokens or not chunks:
+        return rendered, before, before
+
+    units = _units(set(tokenize(question)), chunks)
+    headers = {rank: estimate_tokens(f"[{chunk.heading}]") + 1 for rank, chunk in enumerate(chunks) if chunk.section_path}
+    total = sum(u.tokens for u in units) + sum(headers.values())
+    # Drop the least relevant sentences first (later ones on ties) and keep the rest in original order.
+    kept = set(range(len(units)))
+    for i in sorted(range(len(units)), key=lambda i: (units[i].score, -units[i].chunk, -units[i].position)):
+        if total <= budget_tokens or len(kept) == 1:
+            break
+        kept.discard(i)
+        total -= units[i].tokens
+        if all(units[j].chunk != units[i].chunk for j in kept):
+            total -= headers.get(units[i].chunk, 0)
+
+    blocks = []
+    for rank, chunk in enumerate(chunks):
+        lines = [units[i].text for i in sorted(kept) if units[i].chunk == rank]
+        if not lines:
+            continue
+        header = [f"[{chunk.heading}]"] if chunk.section_path else []
+        blocks.append("\n".join(header + lines))
+    context = "\n\n".join(blocks)
+    return context, before, estimate_tokens(context)
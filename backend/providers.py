@@ -0,0 +1,668 @@
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import partial
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+import httpx
+
+from circuit_breaker import BreakerOptions, BreakerRegistry
+from metrics import provider_call_duration
+from scheduler import AdmissionRejected, AdmissionScheduler, LaneOptions, SchedulerOptions
+from settings import Settings
+from tracing import current_trace
+
+
+NO_MODEL_MESSAGE = (
+    "No valid model key found. Set OPENROUTER_API_KEY (sk-or-v1-...) or GEMINI_API_KEY in backend/.env."
+)
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+class ProviderError(Exception):
+    def __init__(self, message: str, model: str, fatal: bool = False, rate_limited: bool = False):
+        super().__init__(message)
+        self.model = model
+        # Fatal errors (bad credentials) rule out every model of the same provider.
+        self.fatal = fatal
+        # Quota errors rule out every model behind the same key until the quota refills.
+        self.rate_limited = rate_limited
+
+
+def create_provider_client(
+    max_connections: int = 20,
+    max_keepalive_connections: int = 10,
+    keepalive_expiry: float = 30.0,
+    http2: bool = True,
+    timeout: float = 30.0,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry,
+    )
+    return httpx.AsyncClient(timeout=timeout, limits=limits, http2=http2, transport=transport)
+
+
+async def open_provider_client(**options) -> httpx.AsyncClient:
+    global _client
+    await close_provider_client()
+    _client = create_provider_client(**options)
+    return _client
+
+
+async def close_provider_client() -> None:
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
+
+
+def get_provider_client() -> httpx.AsyncClient:
+    global _client
+    # Scripts that skip the app lifespan still get one shared client.
+    if _client is None or _client.is_closed:
+        _client = create_provider_client()
+    return _client
+
+
+def _openrouter_headers(settings: Settings) -> dict[str, str]:
+    return {
+        "Authorization": f"Bearer {settings.openrouter_api_key}",
+        "Content-Type": "application/json",
+        "HTTP-Referer": settings.app_url,
+        "X-Title": settings.site_name,
+    }
+
+
+def _openrouter_payload(settings: Settings, system_prompt: str, user_prompt: str, max_tokens: int) -> dict:
+    return {
+        "model": settings.openrouter_model,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ],
+        "temperature": 0.2,
+        "max_tokens": max_tokens,
+    }
+
+
+def _gemini_candidates(settings: Settings) -> list[str]:
+    gemini_model_candidates = [
+        settings.gemini_model,
+        "gemini-2.5-flash",
+        "gemini-2.0-flash",
+        "gemini-2.5-flash-lite",
+    ]
+    # Preserve order and remove duplicates.
+    return list(dict.fromkeys(gemini_model_candidates))
+
+
+def _gemini_payload(system_prompt: str, user_prompt: str, max_tokens: int) -> dict:
+    return {
+        "contents": [{"role": "user", "parts": [{"text": user_prompt}]}],
+        "systemInstruction": {"parts": [{"text": system_prompt}]},
+        "generationConfig": {"temperature": 0.2, "maxOutputTokens": max_tokens},
+    }
+
+
+def _record_usage(data: dict) -> None:
+    trace = current_trace()
+    if trace is None:
+        return
+    usage = data.get("usage")
+    if usage:
+        trace.record_usage(usage.get("prompt_tokens"), usage.get("completion_tokens"))
+    metadata = data.get("usageMetadata")
+    if metadata:
+        trace.record_usage(metadata.get("promptTokenCount"), metadata.get("candidatesTokenCount"))
+
+
+def _gemini_text(data: dict) -> str:
+    candidates = data.get("candidates", [])
+    if not candidates:
+        return ""
+    parts = candidates[0].get("content", {}).get("parts", [])
+    return "".join([p.get("text", "") for p in parts])
+
+
+@dataclass
+class ProviderCandidate:
+    provider: str
+    model: str
+    call: Callable[[], Awaitable[tuple[str, str]]]
+    stream: Callable[[], AsyncIterator[str]]
+    lane: str
+
+
+class ModelAvailability:
+    def __init__(self):
+        self._missing: dict[tuple[str, str], float] = {}
+
+    def mark_missing(self, provider: str, model: str, ttl_seconds: float) -> None:
+        self._missing[(provider, model)] = time.monotonic() + ttl_seconds
+
+    def is_available(self, provider: str, model: str) -> bool:
+        until = self._missing.get((provider, model))
+        if until is None:
+            return True
+        if until < time.monotonic():
+            del self._missing[(provider, model)]
+            return True
+        return False
+
+    def snapshot(self) -> list[dict]:
+        now = time.monotonic()
+        return [
+            {"provider": provider, "model": model, "retry_in_seconds": round(until - now, 1)}
+            for (provider, model), until in self._missing.items()
+            if until > now
+        ]
+
+
+model_availability = ModelAvailability()
+breakers = BreakerRegistry()
+admission = AdmissionScheduler()
+
+
+def _missing_ttl(settings: Settings) -> float:
+    return settings.model_unavailable_ttl_seconds
+
+
+def _lane(provider: str, api_key: str) -> str:
+    # Quotas belong to the key, so rotating a key starts a fresh bucket; the key itself is never shown.
+    return f"{provider}:{hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:8]}"
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def _openrouter_url(settings: Settings) -> str:
+    return f"{settings.openrouter_base_url.rstrip('/')}/chat/completions"
+
+
+def _gemini_url(settings: Settings, model: str, method: str = "generateContent") -> str:
+    return f"{settings.gemini_base_url.rstrip('/')}/models/{model}:{method}"
+
+
+def _rate_limited(provider: str, api_key: str, model: str, response: httpx.Response) -> ProviderError:
+    retry_after = _retry_after(response)
+    admission.penalize(_lane(provider, api_key), retry_after)
+    wait = f"; retry after {retry_after:.0f}s" if retry_after is not None else ""
+    return ProviderError(f"{provider} rate limit reached for '{model}'{wait}.", model, rate_limited=True)
+
+
+async def _call_openrouter(
+    settings: Settings, system_prompt: str, user_prompt: str, max_tokens: int
+) -> tuple[str, str]:
+    openrouter_model = settings.openrouter_model
+    headers = _openrouter_headers(settings)
+    payload = _openrouter_payload(settings, system_prompt, user_prompt, max_tokens)
+
+    client = get_provider_client()
+    try:
+        response = await client.post(_openrouter_url(settings), headers=headers, json=payload)
+        if response.status_code == 429:
+            raise _rate_limited("openrouter", settings.openrouter_api_key, openrouter_model, response)
+        if response.status_code == 401:
+            raise ProviderError(
+                "OpenRouter returned 401 Unauthorized. Check OPENROUTER_API_KEY or use GEMINI_API_KEY.",
+                openrouter_model,
+                fatal=True,
+            )
+        if response.status_code == 404:
+            model_availability.mark_missing("openrouter", openrouter_model, _missing_ttl(settings))
+        response.raise_for_status()
+        data = response.json()
+    except httpx.HTTPError as exc:
+        raise ProviderError(f"OpenRouter request failed: {exc}", openrouter_model) from exc
+
+    choices = data.get("choices", [])
+    if not choices:
+        raise ProviderError("No response returned by model.", openrouter_model)
+    _record_usage(data)
+
+    message = choices[0].get("message", {})
+    content = message.get("content", "No answer content.")
+    return (content.strip(), openrouter_model)
+
+
+async def _call_gemini(settings: Settings, model: str, payload: dict) -> tuple[str, str]:
+    client = get_provider_client()
+    try:
+        response = await client.post(
+            _gemini_url(settings, model),
+            params={"key": settings.gemini_api_key},
+            headers={"Content-Type": "application/json"},
+            json=payload,
+        )
+    except httpx.HTTPError as exc:
+        raise ProviderError(f"Gemini request failed: {exc}", model) from exc
+
+    if response.status_code == 429:
+        raise _rate_limited("gemini", settings.gemini_api_key, model, response)
+    if response.status_code == 401:
+        raise ProviderError(
+            "Gemini returned 401 Unauthorized. Verify GEMINI_API_KEY in backend/.env and restart backend.",
+            model,
+            fatal=True,
+        )
+    if response.status_code == 404:
+        model_availability.mark_missing("gemini", model, _missing_ttl(settings))
+        raise ProviderError(f"Model '{model}' not found for Gemini API v1beta.", model)
+
+    try:
+        response.raise_for_status()
+        data = response.json()
+    except httpx.HTTPError as exc:
+        raise ProviderError(f"Gemini request failed: {exc}", model) from exc
+
+    candidates = data.get("candidates", [])
+    if not candidates:
+        raise ProviderError(f"No response returned by Gemini model '{model}'.", model)
+    _record_usage(data)
+
+    parts = candidates[0].get("content", {}).get("parts", [])
+    text = " ".join([p.get("text", "") for p in parts]).strip()
+    return (text or "No answer content.", model)
+
+
+def has_openrouter_key(settings: Settings) -> bool:
+    key = settings.openrouter_api_key
+    return bool(key) and key.startswith("sk-or-v1-")
+
+
+async def _stream_openrouter(
+    settings: Settings, system_prompt: str, user_prompt: str, max_tokens: int
+) -> AsyncIterator[str]:
+    openrouter_model = settings.openrouter_model
+    payload = {**_openrouter_payload(settings, system_prompt, user_prompt, max_tokens), "stream": True}
+
+    client = get_provider_client()
+    try:
+        async with client.stream(
+            "POST", _openrouter_url(settings), headers=_openrouter_headers(settings), json=payload
+        ) as response:
+            if response.status_code == 429:
+                raise _rate_limited("openrouter", settings.openrouter_api_key, openrouter_model, response)
+            if response.status_code == 401:
+                raise ProviderError(
+                    "OpenRouter returned 401 Unauthorized. Check OPENROUTER_API_KEY or use GEMINI_API_KEY.",
+                    openrouter_model,
+                    fatal=True,
+                )
+            if response.status_code == 404:
+                model_availability.mark_missing("openrouter", openrouter_model, _missing_ttl(settings))
+            response.raise_for_status()
+            async for data in _sse_data(response, openrouter_model):
+                if "error" in data:
+                    message = data["error"].get("message", "unknown error")
+                    raise ProviderError(f"OpenRouter request failed: {message}", openrouter_model)
+                # Usage arrives on the final chunk.
+                _record_usage(data)
+                choices = data.get("choices", [])
+                if not choices:
+                    continue
+                delta = choices[0].get("delta", {}).get("content")
+                if delta:
+                    yield delta
+    except httpx.HTTPError as exc:
+        raise ProviderError(f"OpenRouter request failed: {exc}", openrouter_model) from exc
+
+
+async def _stream_gemini(settings: Settings, model: str, payload: dict) -> AsyncIterator[str]:
+    client = get_provider_client()
+    try:
+        async with client.stream(
+            "POST",
+            _gemini_url(settings, model, "streamGenerateContent"),
+            params={"key": settings.gemini_api_key, "alt": "sse"},
+            headers={"Content-Type": "application/json"},
+            json=payload,
+        ) as response:
+            if response.status_code == 429:
+                raise _rate_limited("gemini", settings.gemini_api_key, model, response)
+            if response.status_code == 401:
+                raise ProviderError(
+                    "Gemini returned 401 Unauthorized. Verify GEMINI_API_KEY in backend/.env and restart backend.",
+                    model,
+                    fatal=True,
+                )
+            if response.status_code == 404:
+                model_availability.mark_missing("gemini", model, _missing_ttl(settings))
+                raise ProviderError(f"Model '{model}' not found for Gemini API v1beta.", model)
+            response.raise_for_status()
+            async for data in _sse_data(response, model):
+                _record_usage(data)
+                text = _gemini_text(data)
+                if text:
+                    yield text
+    except httpx.HTTPError as exc:
+        raise ProviderError(f"Gemini request failed: {exc}", model) from exc
+
+
+def _breaker_options(settings: Settings) -> BreakerOptions:
+    return BreakerOptions(
+        window_seconds=settings.circuit_window_seconds,
+        min_requests=settings.circuit_min_requests,
+        error_threshold=settings.circuit_error_threshold,
+        open_seconds=settings.circuit_open_seconds,
+        min_timeout=settings.provider_timeout_min_seconds,
+        max_timeout=settings.provider_timeout_max_seconds,
+        timeout_multiplier=settings.provider_timeout_p95_multiplier,
+    )
+
+
+def _configure_admission(settings: Settings) -> None:
+    admission.configure(
+        SchedulerOptions(
+            queue_size=settings.scheduler_queue_size,
+            max_wait_seconds=settings.scheduler_max_wait_seconds,
+        ),
+        {
+            "openrouter": LaneOptions(settings.openrouter_rpm, settings.provider_burst),
+            "gemini": LaneOptions(settings.gemini_rpm, settings.provider_burst),
+        },
+    )
+
+
+def provider_candidates(
+    settings: Settings, system_prompt: str, user_prompt: str, max_tokens: int
+) -> list[ProviderCandidate]:
+    breakers.configure(_breaker_options(settings))
+    _configure_admission(settings)
+    candidates = []
+    if has_openrouter_key(settings):
+        candidates.append(
+            ProviderCandidate(
+                "openrouter",
+                settings.openrouter_model,
+                partial(_call_openrouter, settings, system_prompt, user_prompt, max_tokens),
+                partial(_stream_openrouter, settings, system_prompt, user_prompt, max_tokens),
+                _lane("openrouter", settings.openrouter_api_key),
+            )
+        )
+    if settings.gemini_api_key:
+        payload = _gemini_payload(system_prompt, user_prompt, max_tokens)
+        for model in _gemini_candidates(settings):
+            candidates.append(
+                ProviderCandidate(
+                    "gemini",
+                    model,
+                    partial(_call_gemini, settings, model, payload),
+                    partial(_stream_gemini, settings, model, payload),
+                    _lane("gemini", settings.gemini_api_key),
+                )
+            )
+    # Skip models known to be missing and backends whose circuit is open.
+    return [
+        c
+        for c in candidates
+        if model_availability.is_available(c.provider, c.model) and breakers.get(c.provider, c.model).available()
+    ]
+
+
+def _prune(
+    candidates: list[ProviderCandidate], failed: ProviderCandidate, exc: ProviderError
+) -> list[ProviderCandidate]:
+    if exc.fatal:
+        # A rejected key fails the same way for every model of that provider.
+        return [c for c in candidates if c.provider != failed.provider]
+    if exc.rate_limited:
+        # Overflow goes to the other provider rather than queueing again on the same quota.
+        return [c for c in candidates if c.lane != failed.lane]
+    return candidates
+
+
+async def _admit(candidate: ProviderCandidate) -> None:
+    try:
+        await admission.acquire(candidate.lane)
+    except AdmissionRejected as exc:
+        raise ProviderError(f"{exc}.", candidate.model, rate_limited=True) from exc
+
+
+async def _guarded_call(candidate: ProviderCandidate) -> tuple[str, str]:
+    breaker = breakers.get(candidate.provider, candidate.model)
+    # Check the circuit first: a skipped model must not spend the lane's rate budget.
+    if not breaker.allow():
+        raise ProviderError(f"Circuit open for {breaker.name}; skipped.", candidate.model)
+    try:
+        await _admit(candidate)
+    except (ProviderError, asyncio.CancelledError):
+        breaker.release()
+        raise
+    timeout = breaker.timeout()
+    started = time.monotonic()
+    outcome = "ok"
+    try:
+        result = await asyncio.wait_for(candidate.call(), timeout)
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+        breaker.record_failure()
+        raise ProviderError(f"{breaker.name} did not answer within {timeout:.1f}s.", candidate.model)
+    except ProviderError as exc:
+        # A quota rejection says nothing about the backend's health.
+        if exc.rate_limited:
+            outcome = "rate_limited"
+            breaker.release()
+        else:
+            outcome = "error"
+            breaker.record_failure()
+        raise
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        breaker.release()
+        raise
+    finally:
+        provider_call_duration.observe(
+            time.monotonic() - started, provider=candidate.provider, model=candidate.model, outcome=outcome
+        )
+    breaker.record_success(time.monotonic() - started)
+    return result
+
+
+async def _dispatch_sequential(candidates: list[ProviderCandidate]) -> tuple[str, str]:
+    remaining = list(candidates)
+    last_error: Optional[ProviderError] = None
+    while remaining:
+        candidate = remaining.pop(0)
+        try:
+            return await _guarded_call(candidate)
+        except ProviderError as exc:
+            last_error = exc
+            remaining = _prune(remaining, candidate, exc)
+    assert last_error is not None
+    raise last_error
+
+
+async def _dispatch_concurrent(
+    candidates: list[ProviderCandidate], hedge_delay: Optional[float]
+) -> tuple[str, str]:
+    remaining = list(candidates)
+    running: dict[asyncio.Task, ProviderCandidate] = {}
+    last_error: Optional[ProviderError] = None
+
+    def launch() -> None:
+        candidate = remaining.pop(0)
+        running[asyncio.create_task(_guarded_call(candidate))] = candidate
+
+    try:
+        launch()
+        # Racing starts everything at once; hedging adds one backup per delay.
+        while hedge_delay is None and remaining:
+            launch()
+        while running:
+            timeout = hedge_delay if remaining else None
+            done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                launch()
+                continue
+            for task in done:
+                candidate = running.pop(task)
+                try:
+                    return task.result()
+                except ProviderError as exc:
+                    last_error = exc
+                    remaining = _prune(remaining, candidate, exc)
+            # A failure should not wait out the hedge delay before trying the next model.
+            if remaining:
+                launch()
+    finally:
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+    assert last_error is not None
+    raise last_error
+
+
+def _no_candidates_error(settings: Settings) -> ProviderError:
+    if has_openrouter_key(settings) or settings.gemini_api_key:
+        return ProviderError(
+            "All configured models are temporarily unavailable (not found or circuit open).",
+            settings.gemini_model if settings.gemini_api_key else settings.openrouter_model,
+        )
+    return ProviderError(NO_MODEL_MESSAGE, "no-model")
+
+
+def _all_failed(exc: ProviderError, attempted: int) -> ProviderError:
+    if attempted == 1:
+        return exc
+    return ProviderError(
+        f"All configured models failed. Last error: {exc}", exc.model, rate_limited=exc.rate_limited
+    )
+
+
+async def ask_providers(
+    settings: Settings, system_prompt: str, user_prompt: str, max_tokens: int = 900
+) -> tuple[str, str]:
+    candidates = provider_candidates(settings, system_prompt, user_prompt, max_tokens)
+    if not candidates:
+        raise _no_candidates_error(settings)
+
+    policy = settings.provider_dispatch_policy.lower()
+    try:
+        if policy == "race":
+            return await _dispatch_concurrent(candidates, hedge_delay=None)
+        if policy == "hedged":
+            hedge_delay = settings.provider_hedge_delay_ms / 1000
+            return await _dispatch_concurrent(candidates, hedge_delay=hedge_delay)
+        return await _dispatch_sequential(candidates)
+    except ProviderError as exc:
+        raise _all_failed(exc, len(candidates)) from exc
+
+
+async def _sse_data(response: httpx.Response, model: str) -> AsyncIterator[dict]:
+    async for line in response.aiter_lines():
+        # Comment lines (": keep-alive") and event names carry no payload.
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        if not data:
+            continue
+        try:
+            payload = json.loads(data)
+        except json.JSONDecodeError as exc:
+            # A garbled chunk is a provider failure like any other: fall through to the next model.
+            raise ProviderError(f"Malformed stream chunk from '{model}': {exc}", model) from exc
+        yield payload
+
+
+async def stream_providers(
+    settings: Settings, system_prompt: str, user_prompt: str, max_tokens: int = 900
+) -> AsyncIterator[tuple[str, str]]:
+    candidates = provider_candidates(settings, system_prompt, user_prompt, max_tokens)
+    if not candidates:
+        raise _no_candidates_error(settings)
+
+    remaining = list(candidates)
+    last_error: Optional[ProviderError] = None
+    while remaining:
+        candidate = remaining.pop(0)
+        breaker = breakers.get(candidate.provider, candidate.model)
+        if not breaker.allow():
+            continue
+        try:
+            await _admit(candidate)
+        except ProviderError as exc:
+            breaker.release()
+            last_error = exc
+            remaining = _prune(remaining, candidate, exc)
+            continue
+        timeout = breaker.timeout()
+        started = False
+        attempt_started = time.monotonic()
+        chunks = candidate.stream()
+        try:
+            try:
+                # Only the wait for the first chunk is bounded: total stream time depends on answer length.
+                async with asyncio.timeout(timeout):
+                    first = await anext(chunks, None)
+            except TimeoutError:
+                raise ProviderError(
+                    f"{breaker.name} sent nothing within {timeout:.1f}s.", candidate.model
+                ) from None
+            if first is not None:
+                provider_call_duration.observe(
+                    time.monotonic() - attempt_started,
+                    provider=candidate.provider,
+                    model=candidate.model,
+                    outcome="first_token",
+                )
+                started = True
+                yield (candidate.model, first)
+                async for delta in chunks:
+                    yield (candidate.model, delta)
+        except ProviderError as exc:
+            if not started:
+                provider_call_duration.observe(
+                    time.monotonic() - attempt_started,
+                    provider=candidate.provider,
+                    model=candidate.model,
+                    outcome="rate_limited" if exc.rate_limited else "error",
+                )
+            if exc.rate_limited:
+                breaker.release()
+            else:
+                breaker.record_failure()
+            # Once tokens reached the caller, switching models would garble the answer.
+            if started:
+                raise
+            last_error = exc
+            remaining = _prune(remaining, candidate, exc)
+            continue
+        except (asyncio.CancelledError, GeneratorExit):
+            breaker.release()
+            raise
+        finally:
+            await chunks.aclose()
+        if started:
+            # Stream durations depend on answer length, so they do not feed the timeout estimate.
+            breaker.record_success(None)
+            return
+        # An empty stream produced no answer: it counts against the circuit like any other failure.
+        breaker.record_failure()
+        last_error = ProviderError(f"No response returned by model '{candidate.model}'.", candidate.model)
+
+    if last_error is None:
+        raise _no_candidates_error(settings)
+    raise _all_failed(last_error, len(candidates))
@@ -0,0 +1,126 @@
+import asyncio
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete
+
+from database import SessionLocal
+from models import CachedResponse
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    q = _WHITESPACE_RE.sub(" ", question.lower()).strip()
+    return q.rstrip("?!. ").strip()
+
+
+def cache_key(question: str, resume_digest: str, model: str, prompt_version: str) -> str:
+    raw = "\x1f".join([normalize_question(question), resume_digest, model, prompt_version])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SQLiteResponseStore:
+    def __init__(self, session_factory=SessionLocal):
+        self._session_factory = session_factory
+
+    def get(self, key: str, ttl_seconds: float) -> Optional[tuple[str, str]]:
+        cutoff = datetime.utcnow() - timedelta(seconds=ttl_seconds)
+        with self._session_factory() as db:
+            row = db.get(CachedResponse, key)
+            if row is None or row.created_at < cutoff:
+                return None
+            return (row.answer, row.model)
+
+    def set(self, key: str, value: tuple[str, str]) -> None:
+        answer, model = value
+        with self._session_factory() as db:
+            db.merge(CachedResponse(key=key, answer=answer, model=model, created_at=datetime.utcnow()))
+            db.commit()
+
+    def prune(self, ttl_seconds: float) -> None:
+        cutoff = datetime.utcnow() - timedelta(seconds=ttl_seconds)
+        with self._session_factory() as db:
+            db.execute(delete(CachedResponse).where(CachedResponse.created_at < cutoff))
+            db.commit()
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: float = 3600,
+        store: Optional[SQLiteResponseStore] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.store = store
+        self.config = (max_entries, ttl_seconds, store is not None)
+        self._entries: OrderedDict[str, tuple[float, tuple[str, str]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_prune = time.monotonic()
+        self.hits = 0
+        self.store_hits = 0
+        self.misses = 0
+
+    def _get_memory(self, key: str) -> Optional[tuple[str, str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _set_memory(self, key: str, value: tuple[str, str]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[tuple[str, str]]:
+        value = self._get_memory(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        if self.store is not None:
+            value = await asyncio.to_thread(self.store.get, key, self.ttl_seconds)
+            if value is not None:
+                self.store_hits += 1
+                self._set_memory(key, value)
+                return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: tuple[str, str]) -> None:
+        self._set_memory(key, value)
+        if self.store is None:
+            return
+        await asyncio.to_thread(self.store.set, key, value)
+        if time.monotonic() - self._last_prune > self.ttl_seconds:
+            self._last_prune = time.monotonic()
+            await asyncio.to_thread(self.store.prune, self.ttl_seconds)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.store_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "persistent": self.store is not None,
+            "hits": self.hits,
+            "store_hits": self.store_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.store_hits) / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,321 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from chunking import DEFAULT_CHUNK_MAX_TOKENS, DEFAULT_CHUNK_OVERLAP_TOKENS, Chunk, chunk_markdown
+from retrieval import BM25Index
+
+RESUME_PATH = Path(__file__).with_name("resume.md")
+MISSING_RESUME_TEXT = "Resume data not available."
+DEFAULT_PROFILE = "default"
+DEFAULT_NAME = "The candidate"
+# Bump when the serialized layout or any extractor changes so stale index files are rebuilt.
+INDEX_FORMAT_VERSION = 1
+
+TECH_ALIASES = {
+    "react": "React",
+    "react.js": "React",
+    "next.js": "Next.js",
+    "node.js": "Node.js",
+    "express.js": "Express.js",
+    "typescript": "TypeScript",
+    "javascript": "JavaScript",
+    "python": "Python",
+    "sql": "SQL",
+    "postgresql": "PostgreSQL",
+    "mongodb": "MongoDB",
+    "prisma": "Prisma",
+    "tailwind": "Tailwind CSS",
+    "tailwind css": "Tailwind CSS",
+    "hono": "Hono",
+    "cloudflare workers": "Cloudflare Workers",
+    "vercel": "Vercel",
+    "clerk": "Clerk",
+    "socket.io": "Socket.IO",
+    "langchain": "LangChain",
+    "huggingface": "HuggingFace",
+    "scikit-learn": "scikit-learn",
+    "mysql": "MySQL",
+    "git": "Git/GitHub",
+    "github": "Git/GitHub",
+}
+_TECH_PATTERNS = [
+    (re.compile(r"\b" + re.escape(raw) + r"\b"), canonical) for raw, canonical in TECH_ALIASES.items()
+]
+
+BACKEND_KEYWORDS = [
+    "rest api",
+    "node.js",
+    "express",
+    "postgresql",
+    "prisma",
+    "cloudflare workers",
+    "authentication",
+    "server-side",
+    "database",
+    "mysql",
+    "socket.io",
+]
+
+_GITHUB_URL_RE = re.compile(r"https?://github\.com/[A-Za-z0-9_.-]+(?:/[A-Za-z0-9_.-]+)?")
+_AGE_RE = re.compile(r"Age:\s*([^\n]+)", flags=re.IGNORECASE)
+_NAME_RE = re.compile(r"^#\s+(\S+)", flags=re.MULTILINE)
+
+
+@dataclass(frozen=True)
+class ResumeIndex:
+    text: str
+    digest: str
+    chunks: tuple[Chunk, ...]
+    retriever: BM25Index
+    sections: dict[str, str]
+    project_titles: tuple[str, ...]
+    project_links: tuple[str, ...]
+    github_urls: tuple[str, ...]
+    backend_points: tuple[str, ...]
+    technologies: tuple[tuple[str, int], ...]
+    age: Optional[str]
+    name: str = DEFAULT_NAME
+    profile: str = DEFAULT_PROFILE
+
+    @property
+    def contact(self) -> str:
+        return self.section("Contact")
+
+    def section(self, name: str) -> str:
+        return self.sections.get(name.lower(), "")
+
+
+def extract_top_technologies(resume_text: str) -> List[tuple[str, int]]:
+    text = resume_text.lower()
+    scores: dict[str, int] = {}
+
+    for pattern, canonical in _TECH_PATTERNS:
+        count = len(pattern.findall(text))
+        if count > 0:
+            scores[canonical] = scores.get(canonical, 0) + count
+
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def _extract_sections(lines: List[str]) -> dict[str, str]:
+    sections: dict[str, str] = {}
+    current: Optional[str] = None
+    out: List[str] = []
+    for line in lines:
+        if line.startswith("## "):
+            if current is not None:
+                sections.setdefault(current, "\n".join(out).strip())
+            current = line.strip().lower()[3:]
+            out = [line]
+            continue
+        if current is not None:
+            out.append(line)
+    if current is not None:
+        sections.setdefault(current, "\n".join(out).strip())
+    return sections
+
+
+def _extract_projects(lines: List[str]) -> tuple[List[str], List[str]]:
+    titles: List[str] = []
+    links: List[str] = []
+    capture = False
+
+    for raw in lines:
+        line = raw.strip()
+        if line.lower().startswith("## major projects"):
+            capture = True
+            continue
+        if capture and line.startswith("## "):
+            break
+        if not capture:
+            continue
+
+        if line.startswith("### ") and ")" in line and " " in line:
+            title = line.split(")", 1)[-1].strip()
+            if title:
+                titles.append(title)
+        if "http://" in line or "https://" in line:
+            links.append(line.lstrip("- ").strip())
+
+    return titles, links
+
+
+def _extract_backend_points(lines: List[str]) -> List[str]:
+    points = []
+    for line in lines:
+        line_clean = line.strip("- ").strip()
+        if not line_clean:
+            continue
+        low = line_clean.lower()
+        if any(k in low for k in BACKEND_KEYWORDS):
+            points.append(line_clean)
+    # Preserve order while deduplicating.
+    return list(dict.fromkeys(points))
+
+
+def build_resume_index(
+    text: str,
+    chunk_max_tokens: int = DEFAULT_CHUNK_MAX_TOKENS,
+    chunk_overlap_tokens: int = DEFAULT_CHUNK_OVERLAP_TOKENS,
+    profile: str = DEFAULT_PROFILE,
+) -> ResumeIndex:
+    lines = text.splitlines()
+    chunks = chunk_markdown(text, chunk_max_tokens, chunk_overlap_tokens)
+    titles, links = _extract_projects(lines)
+    age_match = _AGE_RE.search(text)
+    name_match = _NAME_RE.search(text)
+
+    return ResumeIndex(
+        text=text,
+        digest=hashlib.sha256(text.encode("utf-8")).hexdigest(),
+        chunks=tuple(chunks),
+        # Section headings are indexed with the text so "projects" finds project chunks.
+        retriever=BM25Index([f"{chunk.heading}\n{chunk.text}" for chunk in chunks]),
+        sections=_extract_sections(lines),
+        project_titles=tuple(titles),
+        project_links=tuple(links),
+        github_urls=tuple(dict.fromkeys(_GITHUB_URL_RE.findall(text))),
+        backend_points=tuple(_extract_backend_points(lines)),
+        technologies=tuple(extract_top_technologies(text)),
+        age=age_match.group(1) if age_match else None,
+        name=name_match.group(1) if name_match else DEFAULT_NAME,
+        profile=profile,
+    )
+
+
+def _index_files(cache_dir: Path, digest: str, options: tuple[int, int]) -> tuple[Path, Path]:
+    stem = f"{digest[:24]}-{options[0]}-{options[1]}-v{INDEX_FORMAT_VERSION}"
+    return cache_dir / f"{stem}.json", cache_dir / f"{stem}.npy"
+
+
+def save_resume_index(index: ResumeIndex, cache_dir: Path, options: tuple[int, int]) -> None:
+    meta_path, postings_path = _index_files(cache_dir, index.digest, options)
+    terms, offsets, postings = index.retriever.to_postings()
+    meta = {
+        "size": index.retriever.size,
+        "terms": terms,
+        "offsets": offsets,
+        "chunks": [[chunk.text, list(chunk.section_path)] for chunk in index.chunks],
+        "sections": index.sections,
+        "project_titles": index.project_titles,
+        "project_links": index.project_links,
+        "github_urls": index.github_urls,
+        "backend_points": index.backend_points,
+        "technologies": index.technologies,
+        "age": index.age,
+        "name": index.name,
+    }
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # Postings first and the metadata last, each via rename: a reader never sees half a pair.
+    tmp = postings_path.with_suffix(f".{os.getpid()}.tmp")
+    with tmp.open("wb") as handle:
+        np.save(handle, postings)
+    os.replace(tmp, postings_path)
+    tmp = meta_path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(meta, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, meta_path)
+    for stale in cache_dir.iterdir():
+        if stale.suffix in (".json", ".npy") and stale not in (meta_path, postings_path):
+            stale.unlink(missing_ok=True)
+
+
+def load_resume_index(
+    text: str, digest: str, cache_dir: Path, options: tuple[int, int], profile: str = DEFAULT_PROFILE
+) -> Optional[ResumeIndex]:
+    meta_path, postings_path = _index_files(cache_dir, digest, options)
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        # Memory-mapped: cold profiles cost page cache, not heap, and load without parsing postings.
+        postings = np.load(postings_path, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    return ResumeIndex(
+        text=text,
+        digest=digest,
+        chunks=tuple(Chunk(chunk_text, tuple(path)) for chunk_text, path in meta["chunks"]),
+        retriever=BM25Index.from_postings(meta["size"], meta["terms"], meta["offsets"], postings),
+        sections=meta["sections"],
+        project_titles=tuple(meta["project_titles"]),
+        project_links=tuple(meta["project_links"]),
+        github_urls=tuple(meta["github_urls"]),
+        backend_points=tuple(meta["backend_points"]),
+        technologies=tuple((tech, count) for tech, count in meta["technologies"]),
+        age=meta["age"],
+        name=meta["name"],
+        profile=profile,
+    )
+
+
+class ResumeIndexLoader:
+    def __init__(self, path: Path, profile: str = DEFAULT_PROFILE, cache_dir: Optional[Path] = None):
+        self.path = path
+        self.profile = profile
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._stamp: Optional[tuple] = None
+        self._index: Optional[ResumeIndex] = None
+        self._options: Optional[tuple[int, int]] = None
+
+    def _current_stamp(self) -> Optional[tuple[int, int]]:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def get(
+        self,
+        chunk_max_tokens: int = DEFAULT_CHUNK_MAX_TOKENS,
+        chunk_overlap_tokens: int = DEFAULT_CHUNK_OVERLAP_TOKENS,
+    ) -> ResumeIndex:
+        options = (chunk_max_tokens, chunk_overlap_tokens)
+        stamp = (self._current_stamp(), options)
+        index = self._index
+        if index is not None and stamp == self._stamp:
+            return index
+
+        with self._lock:
+            if self._index is not None and stamp == self._stamp:
+                return self._index
+            if stamp[0] is None:
+                text = MISSING_RESUME_TEXT
+            else:
+                text = self.path.read_text(encoding="utf-8")
+            digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            # A touched file with identical content keeps the existing index.
+            if self._index is None or self._index.digest != digest or self._options != options:
+                self._index = self._load_or_build(text, digest, options)
+                self._options = options
+            self._stamp = stamp
+            return self._index
+
+    def _load_or_build(self, text: str, digest: str, options: tuple[int, int]) -> ResumeIndex:
+        if self.cache_dir is None or text == MISSING_RESUME_TEXT:
+            return build_resume_index(text, *options, profile=self.profile)
+        index = load_resume_index(text, digest, self.cache_dir, options, self.profile)
+        if index is None:
+            index = build_resume_index(text, *options, profile=self.profile)
+            try:
+                save_resume_index(index, self.cache_dir, options)
+            except OSError:
+                # A read-only disk only costs the next cold start a rebuild.
+                pass
+        return index
+
+
+_default_loader = ResumeIndexLoader(RESUME_PATH)
+
+
+def get_resume_index(
+    chunk_max_tokens: int = DEFAULT_CHUNK_MAX_TOKENS,
+    chunk_overlap_tokens: int = DEFAULT_CHUNK_OVERLAP_TOKENS,
+) -> ResumeIndex:
+    return _default_loader.get(chunk_max_tokens, chunk_overlap_tokens)
@@ -0,0 +1,201 @@
+import asyncio
+import json
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterator, Optional
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, engine
+from history import EXPORT_COLUMNS, message_record
+from models import ChatArchive, ChatMessage
+from settings import Settings, get_settings
+
+# Rows per compressed blob: large enough to compress well, small enough to keep each move transaction short.
+ARCHIVE_BLOB_ROWS = 2000
+COMPRESSION_LEVEL = 6
+_AUTO_VACUUM_INCREMENTAL = 2
+
+
+@dataclass(frozen=True)
+class RetentionOptions:
+    # 0 keeps every message in chat_messages.
+    retention_days: int = 0
+    interval_seconds: float = 3600.0
+    # Free pages returned to the OS per run; 0 disables vacuuming.
+    vacuum_pages: int = 2000
+    # Databases created before incremental auto-vacuum need one full, blocking VACUUM to switch over.
+    vacuum_convert: bool = False
+    max_blobs_per_run: int = 50
+
+
+def retention_options(settings: Settings) -> RetentionOptions:
+    return RetentionOptions(
+        retention_days=settings.retention_days,
+        interval_seconds=settings.retention_interval_seconds,
+        vacuum_pages=settings.retention_vacuum_pages,
+        vacuum_convert=settings.retention_vacuum_convert,
+        max_blobs_per_run=settings.retention_max_blobs_per_run,
+    )
+
+
+def _archive_next_blob(cutoff: datetime) -> Optional[dict]:
+    with SessionLocal() as db:
+        # Both lookups ride the created_at index; the oldest day is always archived first.
+        oldest = db.execute(select(func.min(ChatMessage.created_at)).where(ChatMessage.created_at < cutoff)).scalar()
+        if oldest is None:
+            return None
+        day_start = oldest.replace(hour=0, minute=0, second=0, microsecond=0)
+        day_end = min(day_start + timedelta(days=1), cutoff)
+        rows = db.execute(
+            select(*EXPORT_COLUMNS)
+            .where(ChatMessage.created_at >= day_start, ChatMessage.created_at < day_end)
+            .order_by(ChatMessage.id.asc())
+            .limit(ARCHIVE_BLOB_ROWS)
+        ).all()
+        payload = "".join(json.dumps(message_record(row)) + "\n" for row in rows).encode("utf-8")
+        blob = zlib.compress(payload, COMPRESSION_LEVEL)
+        ids = [row.id for row in rows]
+        # Copy and delete in one transaction: a message is either hot or archived, never both or neither.
+        db.add(
+            ChatArchive(
+                day=day_start.date().isoformat(),
+                first_id=ids[0],
+                last_id=ids[-1],
+                rows=len(ids),
+                raw_bytes=len(payload),
+                blob=blob,
+            )
+        )
+        db.execute(delete(ChatMessage).where(ChatMessage.id.in_(ids)))
+        db.commit()
+    return {"rows": len(ids), "raw_bytes": len(payload), "compressed_bytes": len(blob)}
+
+
+def archive_old_messages(retention_days: int, max_blobs: int) -> dict:
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    result = {"blobs": 0, "rows": 0, "raw_bytes": 0, "compressed_bytes": 0}
+    for _ in range(max_blobs):
+        moved = _archive_next_blob(cutoff)
+        if moved is None:
+            break
+        result["blobs"] += 1
+        for name, value in moved.items():
+            result[name] += value
+    return result
+
+
+def vacuum(pages: int, convert: bool = False) -> dict:
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        mode = conn.execute(text("PRAGMA auto_vacuum")).scalar_one()
+        free_before = conn.execute(text("PRAGMA freelist_count")).scalar_one()
+        full_vacuum = bool(free_before) and mode != _AUTO_VACUUM_INCREMENTAL and convert
+        if full_vacuum:
+            # Rewrites the whole file and blocks writers meanwhile; later runs are incremental.
+            conn.execute(text("PRAGMA auto_vacuum=INCREMENTAL"))
+            conn.execute(text("VACUUM"))
+        elif free_before and mode == _AUTO_VACUUM_INCREMENTAL:
+            # The sqlite3 module steps a no-column pragma only once (one page); executescript runs it to completion.
+            conn.connection.driver_connection.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+        free_after = conn.execute(text("PRAGMA freelist_count")).scalar_one()
+    return {
+        "auto_vacuum": "incremental" if mode == _AUTO_VACUUM_INCREMENTAL or full_vacuum else "none",
+        "free_pages_before": free_before,
+        "free_pages_after": free_after,
+        "full_vacuum": full_vacuum,
+    }
+
+
+def archive_days(db: Session) -> list[dict]:
+    rows = db.execute(
+        select(
+            ChatArchive.day,
+            func.count(ChatArchive.id),
+            func.sum(ChatArchive.rows),
+            func.sum(ChatArchive.raw_bytes),
+            func.sum(func.length(ChatArchive.blob)),
+        )
+        .group_by(ChatArchive.day)
+        .order_by(ChatArchive.day.desc())
+    ).all()
+    return [
+        {"day": day, "blobs": blobs, "rows": count, "raw_bytes": raw, "compressed_bytes": compressed}
+        for day, blobs, count, raw, compressed in rows
+    ]
+
+
+def iter_archive_ndjson(day: str, session_id: Optional[str] = None) -> Iterator[str]:
+    with SessionLocal() as db:
+        blob_ids = list(
+            db.execute(select(ChatArchive.id).where(ChatArchive.day == day).order_by(ChatArchive.first_id)).scalars()
+        )
+    for blob_id in blob_ids:
+        # One blob in memory at a time, each read in its own short session.
+        with SessionLocal() as db:
+            blob = db.execute(select(ChatArchive.blob).where(ChatArchive.id == blob_id)).scalar_one_or_none()
+        if blob is None:
+            continue
+        lines = zlib.decompress(blob).decode("utf-8").splitlines(keepends=True)
+        if session_id is not None:
+            lines = [line for line in lines if json.loads(line)["session_id"] == session_id]
+        yield "".join(lines)
+
+
+class RetentionJob:
+    def __init__(self):
+        self.options = RetentionOptions()
+        self.runs = 0
+        self.archived_rows = 0
+        self.archived_blobs = 0
+        self.last_run: Optional[dict] = None
+        self.last_error: Optional[str] = None
+
+    def run_once(self, options: RetentionOptions) -> dict:
+        started = time.perf_counter()
+        result: dict = {}
+        # Vacuuming only reclaims what archiving freed, so both are off until retention is configured.
+        if options.retention_days > 0:
+            result["archived"] = archive_old_messages(options.retention_days, options.max_blobs_per_run)
+            self.archived_rows += result["archived"]["rows"]
+            self.archived_blobs += result["archived"]["blobs"]
+            if options.vacuum_pages > 0:
+                result["vacuum"] = vacuum(options.vacuum_pages, options.vacuum_convert)
+        result["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        result["finished_at"] = time.time()
+        self.runs += 1
+        self.last_run = result
+        return result
+
+    async def watch(self) -> None:
+        while True:
+            self.options = retention_options(get_settings())
+            # The first run waits a full interval: startup, when the chat writer and warm-up are busy, is left alone.
+            await asyncio.sleep(self.options.interval_seconds)
+            self.options = retention_options(get_settings())
+            if self.options.retention_days <= 0:
+                continue
+            try:
+                # Archiving and VACUUM are blocking SQLite work: keep them off the event loop.
+                await asyncio.to_thread(self.run_once, self.options)
+                self.last_error = None
+            except Exception as exc:
+                self.last_error = str(exc)
+
+    def stats(self) -> dict:
+        return {
+            "retention_days": self.options.retention_days,
+            "interval_seconds": self.options.interval_seconds,
+            "vacuum_pages": self.options.vacuum_pages,
+            "vacuum_convert": self.options.vacuum_convert,
+            "runs": self.runs,
+            "archived_rows": self.archived_rows,
+            "archived_blobs": self.archived_blobs,
+            "last_run": self.last_run,
+            "last_error": self.last_error,
+        }
+
+
+retention_job = RetentionJob()
@@ -0,0 +1,102 @@
+import math
+import re
+from collections import Counter, defaultdict
+from typing import List, Sequence
+
+import numpy as np
+
+POSTING_DTYPE = np.dtype([("doc", "<i4"), ("weight", "<f4")])
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.#-][a-z0-9]+)*\+*")
+
+STOPWORDS = frozenset(
+    """
+    a an and are as at be by did do does for from had has have he her his how i in is it its
+    me my of on or she so than that the their them then there these they this to was were
+    what when where which who whom why will with you your
+    """.split()
+)
+
+
+def split_words(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in split_words(text) if t not in STOPWORDS]
+
+
+class BM25Index:
+    def __init__(self, documents: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        self.size = len(documents)
+        doc_tokens = [tokenize(doc) for doc in documents]
+        lengths = np.array([len(tokens) for tokens in doc_tokens], dtype=np.float32)
+        avgdl = float(lengths.mean()) if self.size and lengths.any() else 1.0
+
+        raw_postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        for doc_id, tokens in enumerate(doc_tokens):
+            for term, tf in Counter(tokens).items():
+                raw_postings[term].append((doc_id, tf))
+
+        # Document statistics are fixed once built, so each posting stores its
+        # final BM25 weight and query scoring is a pure scatter-add.
+        norm = k1 * (1.0 - b + b * lengths / avgdl)
+        self._postings: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        for term, entries in raw_postings.items():
+            doc_ids = np.fromiter((d for d, _ in entries), dtype=np.int32, count=len(entries))
+            tfs = np.fromiter((tf for _, tf in entries), dtype=np.float32, count=len(entries))
+            df = len(entries)
+            idf = math.log(1.0 + (self.size - df + 0.5) / (df + 0.5))
+            weights = idf * tfs * (k1 + 1.0) / (tfs + norm[doc_ids])
+            self._postings[term] = (doc_ids, weights.astype(np.float32))
+
+    @classmethod
+    def from_postings(
+        cls, size: int, terms: Sequence[str], offsets: Sequence[int], postings: np.ndarray
+    ) -> "BM25Index":
+        # postings is a structured ("doc", "weight") array, typically memory-mapped; terms own
+        # consecutive slices of it, so nothing is copied until a query touches a term.
+        index = cls.__new__(cls)
+        index.size = size
+        doc_ids, weights = postings["doc"], postings["weight"]
+        index._postings = {
+            term: (doc_ids[offsets[i] : offsets[i + 1]], weights[offsets[i] : offsets[i + 1]])
+            for i, term in enumerate(terms)
+        }
+        return index
+
+    def to_postings(self) -> tuple[List[str], List[int], np.ndarray]:
+        terms = sorted(self._postings)
+        offsets = [0]
+        for term in terms:
+            offsets.append(offsets[-1] + len(self._postings[term][0]))
+        postings = np.empty(offsets[-1], dtype=POSTING_DTYPE)
+        for i, term in enumerate(terms):
+            doc_ids, weights = self._postings[term]
+            postings["doc"][offsets[i] : offsets[i + 1]] = doc_ids
+            postings["weight"][offsets[i] : offsets[i + 1]] = weights
+        return terms, offsets, postings
+
+    def scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(self.size, dtype=np.float32)
+        for term, qtf in Counter(tokenize(query)).items():
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            doc_ids, weights = posting
+            scores[doc_ids] += qtf * weights
+        return scores
+
+    def top_k(self, query: str, k: int) -> List[int]:
+        if self.size == 0 or k <= 0:
+            return []
+        scores = self.scores(query)
+        candidates = np.arange(self.size)
+        if k < self.size:
+            kth = np.partition(scores, self.size - k)[self.size - k]
+            above = np.flatnonzero(scores > kth)
+            ties = np.flatnonzero(scores == kth)[: k - len(above)]
+            candidates = np.concatenate((above, ties))
+        # Highest score first; ties keep document order.
+        order = np.lexsort((candidates, -scores[candidates]))
+        return [int(doc_id) for doc_id in candidates[order]]
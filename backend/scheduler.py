@@ -0,0 +1,204 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+# Lower runs first. Interactive chat uses the default; background work should pass a larger value.
+INTERACTIVE_PRIORITY = 0
+BACKGROUND_PRIORITY = 10
+
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar("admission_priority", default=INTERACTIVE_PRIORITY)
+
+
+@contextmanager
+def admission_priority(priority: int) -> Iterator[None]:
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class AdmissionRejected(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class LaneOptions:
+    requests_per_minute: float
+    burst: int = 4
+
+
+@dataclass(frozen=True)
+class SchedulerOptions:
+    queue_size: int = 100
+    max_wait_seconds: float = 10.0
+
+
+class TokenBucket:
+    def __init__(self, requests_per_minute: float, burst: int):
+        self.rate = requests_per_minute / 60
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.blocked_until = 0.0
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self) -> float:
+        now = time.monotonic()
+        self._refill(now)
+        blocked = max(0.0, self.blocked_until - now)
+        # A zero rate means no quota: only an explicit block from the provider makes callers wait.
+        if self.tokens >= 1 or self.rate <= 0:
+            return blocked
+        return max(blocked, (1 - self.tokens) / self.rate)
+
+    def take(self) -> bool:
+        if self.wait_time() > 0:
+            return False
+        if self.rate > 0:
+            self.tokens -= 1
+        return True
+
+    def block(self, seconds: float) -> None:
+        # The provider told us when to come back; that wins over our own estimate.
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = min(self.tokens, 0.0)
+
+
+class _Lane:
+    def __init__(self, name: str, options: LaneOptions):
+        self.name = name
+        self.options = options
+        self.bucket = TokenBucket(options.requests_per_minute, options.burst)
+        self.heap: list[tuple[int, int, asyncio.Future]] = []
+        self.pump: Optional[asyncio.Task] = None
+        self.admitted = 0
+        self.rejected = 0
+        self.rate_limited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record_wait(self, waited: float) -> None:
+        self.admitted += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+
+
+class AdmissionScheduler:
+    def __init__(self, options: Optional[SchedulerOptions] = None):
+        self.options = options or SchedulerOptions()
+        self.lane_options: dict[str, LaneOptions] = {}
+        self._lanes: dict[str, _Lane] = {}
+        self._seq = itertools.count()
+
+    def configure(self, options: SchedulerOptions, lane_options: dict[str, LaneOptions]) -> None:
+        self.options = options
+        if lane_options != self.lane_options:
+            self.lane_options = lane_options
+            for lane in list(self._lanes.values()):
+                configured = lane_options.get(lane.name.split(":", 1)[0], lane.options)
+                if configured.requests_per_minute <= 0:
+                    self._drop(lane)
+                elif lane.options != configured:
+                    lane.options = configured
+                    lane.bucket = TokenBucket(configured.requests_per_minute, configured.burst)
+
+    def _drop(self, lane: _Lane) -> None:
+        # Quota switched off at runtime: behave like a provider that never had a lane and admit the waiters.
+        del self._lanes[lane.name]
+        if lane.pump is not None:
+            lane.pump.cancel()
+            lane.pump = None
+        for _, _, future in lane.heap:
+            if not future.done():
+                future.set_result(None)
+        lane.heap.clear()
+
+    def _lane(self, name: str) -> Optional[_Lane]:
+        lane = self._lanes.get(name)
+        if lane is None:
+            options = self.lane_options.get(name.split(":", 1)[0])
+            if options is None or options.requests_per_minute <= 0:
+                # No quota configured for this provider: admit everything.
+                return None
+            lane = self._lanes[name] = _Lane(name, options)
+        return lane
+
+    async def _pump(self, lane: _Lane) -> None:
+        while lane.heap:
+            wait = lane.bucket.wait_time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            _, _, future = heapq.heappop(lane.heap)
+            # Waiters that gave up leave a finished future behind; they do not consume a token.
+            if future.done():
+                continue
+            lane.bucket.take()
+            future.set_result(None)
+        lane.pump = None
+
+    async def acquire(self, name: str) -> None:
+        lane = self._lane(name)
+        if lane is None:
+            return
+        if not lane.heap and lane.bucket.take():
+            lane.record_wait(0.0)
+            return
+
+        max_wait = self.options.max_wait_seconds
+        if lane.bucket.wait_time() > max_wait:
+            lane.rejected += 1
+            raise AdmissionRejected(f"{name} is rate limited for {lane.bucket.wait_time():.0f}s")
+        if len(lane.heap) >= self.options.queue_size:
+            lane.rejected += 1
+            raise AdmissionRejected(f"{name} admission queue is full")
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(lane.heap, (_priority.get(), next(self._seq), future))
+        if lane.pump is None:
+            lane.pump = asyncio.create_task(self._pump(lane))
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(future, max_wait)
+        except asyncio.TimeoutError:
+            lane.rejected += 1
+            raise AdmissionRejected(f"{name} admission wait exceeded {max_wait:.0f}s") from None
+        lane.record_wait(time.monotonic() - started)
+
+    def penalize(self, name: str, retry_after: Optional[float]) -> None:
+        lane = self._lane(name)
+        if lane is None:
+            return
+        lane.rate_limited += 1
+        if retry_after is None:
+            retry_after = 60 / lane.options.requests_per_minute if lane.options.requests_per_minute > 0 else 60.0
+        lane.bucket.block(retry_after)
+
+    def snapshot(self) -> list[dict]:
+        lanes = []
+        for lane in list(self._lanes.values()):
+            wait = lane.bucket.wait_time()
+            lanes.append(
+                {
+                    "lane": lane.name,
+                    "requests_per_minute": lane.options.requests_per_minute,
+                    "tokens": round(lane.bucket.tokens, 2),
+                    "queued": sum(1 for _, _, f in lane.heap if not f.done()),
+                    "admitted": lane.admitted,
+                    "rejected": lane.rejected,
+                    "rate_limited_responses": lane.rate_limited,
+                    "avg_wait_ms": round(lane.total_wait / lane.admitted * 1000, 1) if lane.admitted else 0.0,
+                    "max_wait_ms": round(lane.max_wait * 1000, 1),
+                    "next_token_in_ms": round(wait * 1000, 1),
+                }
+            )
+        return lanes
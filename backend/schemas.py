@@ -1,10 +1,23 @@
 from datetime import datetime
+from typing import Annotated, List, Optional
 
 from pydantic import BaseModel, Field
 
+from profiles import PROFILE_ID_PATTERN
+
 
 class ChatRequest(BaseModel):
     question: str = Field(min_length=2, max_length=2000)
+    session_id: Optional[str] = Field(default=None, max_length=64)
+    profile: Optional[str] = Field(default=None, pattern=PROFILE_ID_PATTERN)
+
+
+class BatchChatRequest(BaseModel):
+    questions: List[Annotated[str, Field(min_length=2, max_length=2000)]] = Field(min_length=1)
+    session_id: Optional[str] = Field(default=None, max_length=64)
+    profile: Optional[str] = Field(default=None, pattern=PROFILE_ID_PATTERN)
+    # NDJSON, one result per line as soon as it is ready (order follows completion, not the request).
+    stream: bool = False
 
 
 class ChatResponse(BaseModel):
@@ -12,11 +25,23 @@ class ChatResponse(BaseModel):
     model: str
 
 
+class BatchAnswer(ChatResponse):
+    index: int
+    question: str
+
+
+class BatchChatResponse(BaseModel):
+    results: List[BatchAnswer]
+
+
 class ChatMessageOut(BaseModel):
     id: int
     role: str
     content: str
     created_at: datetime
+    session_id: Optional[str] = None
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
 
     class Config:
         from_attributes = True
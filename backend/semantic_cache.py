@@ -0,0 +1,165 @@
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+from retrieval import tokenize
+
+
+class HashedNgramVectorizer:
+    def __init__(self, dim: int = 2048, char_ngrams: tuple[int, ...] = (3, 4)):
+        self.dim = dim
+        self.char_ngrams = char_ngrams
+
+    def _features(self, text: str) -> List[str]:
+        features = []
+        for token in tokenize(text):
+            features.append(f"w:{token}")
+            padded = f"<{token}>"
+            for n in self.char_ngrams:
+                features.extend(f"c:{padded[i:i + n]}" for i in range(len(padded) - n + 1))
+        return features
+
+    def transform(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature in self._features(text):
+            # crc32 is stable across processes, unlike hash().
+            digest = zlib.crc32(feature.encode("utf-8"))
+            vector[digest % self.dim] += 1.0 if digest & 0x80000000 else -1.0
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+
+@dataclass
+class SemanticEntry:
+    namespace: str
+    question: str
+    answer: str
+    model: str
+    created_at: float
+    last_used: float
+    hits: int = 0
+
+
+class SemanticCache:
+    def __init__(
+        self,
+        capacity: int = 256,
+        threshold: float = 0.9,
+        ttl_seconds: float = 3600,
+        vectorizer: Optional[HashedNgramVectorizer] = None,
+    ):
+        if capacity < 1:
+            raise ValueError("SemanticCache capacity must be at least 1.")
+        self.capacity = capacity
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.config = (capacity, threshold, ttl_seconds)
+        self.vectorizer = vectorizer or HashedNgramVectorizer()
+        self._matrix = np.zeros((capacity, self.vectorizer.dim), dtype=np.float32)
+        self._entries: List[Optional[SemanticEntry]] = [None] * capacity
+        # Popped from the end, so slots fill in order.
+        self._free = list(range(capacity - 1, -1, -1))
+        # Slots per namespace: profiles share the matrix, and a lookup only scores its own profile's answers.
+        self._slots: dict[str, set[int]] = {}
+        # The same question in the same namespace replaces its entry instead of adding a duplicate row.
+        self._by_question: dict[tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _question_key(question: str) -> str:
+        # The vectorizer only sees these tokens, so questions with the same key have the same vector.
+        return " ".join(tokenize(question))
+
+    def _clear(self, slot: int) -> None:
+        entry = self._entries[slot]
+        slots = self._slots.get(entry.namespace)
+        if slots is not None:
+            slots.discard(slot)
+            if not slots:
+                del self._slots[entry.namespace]
+        self._by_question.pop((entry.namespace, self._question_key(entry.question)), None)
+        self._matrix[slot] = 0.0
+        self._entries[slot] = None
+        self._free.append(slot)
+
+    def lookup(self, question: str, namespace: str) -> Optional[tuple[str, str, float]]:
+        vector = self.vectorizer.transform(question)
+        now = time.monotonic()
+        with self._lock:
+            # A changed resume, model or prompt gives a new namespace; old entries are never matched and age out.
+            slots = self._slots.get(namespace, set())
+            # Expired answers go before ranking, so they cannot hide a fresh match below them.
+            for slot in [s for s in slots if now - self._entries[s].created_at > self.ttl_seconds]:
+                self._clear(slot)
+            slots = self._slots.get(namespace)
+            if not slots:
+                self.misses += 1
+                return None
+            candidates = np.fromiter(slots, dtype=np.intp, count=len(slots))
+            similarities = self._matrix[candidates] @ vector
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                self.misses += 1
+                return None
+            entry = self._entries[int(candidates[best])]
+            entry.last_used = now
+            entry.hits += 1
+            self.hits += 1
+            return (entry.answer, entry.model, similarity)
+
+    def store(self, question: str, answer: str, model: str, namespace: str) -> None:
+        vector = self.vectorizer.transform(question)
+        if not vector.any():
+            return
+        now = time.monotonic()
+        key = (namespace, self._question_key(question))
+        with self._lock:
+            slot = self._by_question.get(key)
+            if slot is not None:
+                self._clear(slot)
+            elif not self._free:
+                # Least recently used across every namespace, so stale namespaces go first.
+                self._clear(min(range(self.capacity), key=lambda i: self._entries[i].last_used))
+                self.evictions += 1
+            slot = self._free.pop()
+            self._matrix[slot] = vector
+            self._entries[slot] = SemanticEntry(
+                namespace=namespace, question=question, answer=answer, model=model, created_at=now, last_used=now
+            )
+            self._slots.setdefault(namespace, set()).add(slot)
+            self._by_question[key] = slot
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            entries = [
+                {
+                    "question": entry.question,
+                    "model": entry.model,
+                    "hits": entry.hits,
+                    "age_seconds": round(now - entry.created_at, 1),
+                }
+                for entry in self._entries
+                if entry is not None
+            ]
+            namespaces = len(self._slots)
+        lookups = self.hits + self.misses
+        return {
+            "capacity": self.capacity,
+            "threshold": self.threshold,
+            "size": len(entries),
+            "namespaces": namespaces,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": sorted(entries, key=lambda e: e["hits"], reverse=True),
+        }
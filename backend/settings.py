@@ -0,0 +1,206 @@
+import asyncio
+import hashlib
+import os
+import signal
+import threading
+from dataclasses import dataclass, fields, replace
+from pathlib import Path
+from typing import Optional
+
+from dotenv import dotenv_values
+
+from chunking import DEFAULT_CHUNK_MAX_TOKENS, DEFAULT_CHUNK_OVERLAP_TOKENS
+
+ENV_PATH = Path(__file__).with_name(".env")
+
+_TRUE_VALUES = {"1", "true", "yes"}
+# Floor for the .env poll interval: 0 or a negative value would spin the event loop.
+MIN_POLL_SECONDS = 0.5
+
+
+@dataclass(frozen=True)
+class Settings:
+    openrouter_api_key: str = ""
+    openrouter_model: str = "meta-llama/llama-3.3-8b-instruct:free"
+    gemini_api_key: str = ""
+    gemini_model: str = "gemini-2.5-flash"
+    openrouter_base_url: str = "https://openrouter.ai/api/v1"
+    gemini_base_url: str = "https://generativelanguage.googleapis.com/v1beta"
+    app_url: str = "http://localhost:5173"
+    site_name: str = "Portfolio AI"
+    retrieval_top_k: int = 2
+    profiles_dir: str = "profiles"
+    profiles_max_loaded: int = 32
+    profile_index_dir: str = ".index_cache"
+    chunk_max_tokens: int = DEFAULT_CHUNK_MAX_TOKENS
+    chunk_overlap_tokens: int = DEFAULT_CHUNK_OVERLAP_TOKENS
+    response_cache_size: int = 512
+    response_cache_ttl_seconds: float = 3600.0
+    response_cache_persist: bool = False
+    semantic_cache_enabled: bool = True
+    semantic_cache_size: int = 256
+    semantic_cache_threshold: float = 0.85
+    provider_max_connections: int = 20
+    provider_max_keepalive: int = 10
+    provider_keepalive_expiry: float = 30.0
+    provider_http2: bool = True
+    provider_dispatch_policy: str = "sequential"
+    provider_hedge_delay_ms: float = 800.0
+    model_unavailable_ttl_seconds: float = 3600.0
+    circuit_window_seconds: float = 60.0
+    circuit_min_requests: int = 5
+    circuit_error_threshold: float = 0.5
+    circuit_open_seconds: float = 30.0
+    provider_timeout_min_seconds: float = 5.0
+    provider_timeout_max_seconds: float = 30.0
+    provider_timeout_p95_multiplier: float = 2.0
+    chat_persist_mode: str = "write_behind"
+    chat_persist_durability: str = "buffered"
+    chat_persist_flush_ms: float = 50.0
+    chat_persist_max_batch: int = 256
+    chat_persist_max_pending: int = 10000
+    chat_persist_retries: int = 3
+    chat_persist_retry_backoff_ms: float = 100.0
+    prompt_input_budget_tokens: int = 1500
+    prompt_max_output_tokens: int = 900
+    openrouter_rpm: float = 20.0
+    gemini_rpm: float = 10.0
+    provider_burst: int = 4
+    scheduler_queue_size: int = 100
+    scheduler_max_wait_seconds: float = 10.0
+    warmup_enabled: bool = True
+    warmup_faq_file: str = "faq.txt"
+    warmup_concurrency: int = 2
+    warmup_retry_seconds: float = 300.0
+    batch_max_questions: int = 50
+    batch_concurrency: int = 8
+    retention_days: int = 0
+    retention_interval_seconds: float = 3600.0
+    retention_vacuum_pages: int = 2000
+    retention_vacuum_convert: bool = False
+    retention_max_blobs_per_run: int = 50
+    coalesce_enabled: bool = True
+    coalesce_window_ms: float = 50.0
+    conversation_max_turns: int = 6
+    conversation_max_sessions: int = 1000
+    conversation_history_tokens: int = 600
+    conversation_overflow_policy: str = "summarize"
+    sqlite_journal_mode: str = "wal"
+    sqlite_synchronous: str = "normal"
+    sqlite_cache_size_kb: int = 65536
+    sqlite_mmap_size_mb: int = 256
+    sqlite_busy_timeout_ms: int = 5000
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+    server_timing: bool = False
+    settings_poll_seconds: float = 2.0
+    # Bumped by SettingsStore every time a reload changes any value.
+    version: int = 0
+
+    @property
+    def poll_interval(self) -> float:
+        return max(MIN_POLL_SECONDS, self.settings_poll_seconds)
+
+    @property
+    def answer_fingerprint(self) -> str:
+        # Only values that change what a model answer looks like; key rotation keeps cached answers.
+        raw = "\x1f".join(
+            str(v)
+            for v in (
+                self.openrouter_model,
+                self.gemini_model,
+                self.retrieval_top_k,
+                self.chunk_max_tokens,
+                self.chunk_overlap_tokens,
+                self.prompt_input_budget_tokens,
+                self.prompt_max_output_tokens,
+            )
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:12]
+
+
+def _parse(field_type: type, raw: str):
+    if field_type is bool:
+        return raw.lower() in _TRUE_VALUES
+    return field_type(raw)
+
+
+def load_settings(path: Path = ENV_PATH, version: int = 0) -> Settings:
+    # .env values win over the process environment, but nothing is written back to os.environ.
+    values = {**os.environ, **{k: v for k, v in dotenv_values(path).items() if v is not None}}
+    parsed = {}
+    for field in fields(Settings):
+        if field.name == "version":
+            continue
+        raw = values.get(field.name.upper(), "").strip()
+        # Empty values fall back to the default, like an unset variable.
+        if raw:
+            value = _parse(field.type, raw)
+            # Sizes, counts, TTLs and intervals are all non-negative; 0 keeps its "disabled" meaning.
+            if field.type in (int, float) and value < 0:
+                raise ValueError(f"{field.name.upper()} must not be negative (got {raw}).")
+            parsed[field.name] = value
+    return Settings(version=version, **parsed)
+
+
+class SettingsStore:
+    def __init__(self, path: Path = ENV_PATH):
+        self.path = path
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._mtime = self._stat()
+        self._current = load_settings(path, version=1)
+
+    @property
+    def current(self) -> Settings:
+        return self._current
+
+    def _stat(self) -> Optional[int]:
+        try:
+            return self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def reload(self) -> Settings:
+        with self._lock:
+            self._mtime = self._stat()
+            try:
+                fresh = load_settings(self.path, version=self._current.version)
+            except ValueError as exc:
+                # Keep serving the last good snapshot when .env has a malformed value.
+                self.last_error = str(exc)
+                return self._current
+            self.last_error = None
+            if fresh != self._current:
+                self._current = replace(fresh, version=self._current.version + 1)
+            return self._current
+
+    def reload_if_changed(self) -> Settings:
+        if self._stat() != self._mtime:
+            return self.reload()
+        return self._current
+
+    async def watch(self) -> None:
+        while True:
+            await asyncio.sleep(self._current.poll_interval)
+            self.reload_if_changed()
+
+    def install_sighup_handler(self) -> None:
+        # Signal handlers can only be installed from the main thread (uvicorn in a thread, test clients).
+        if not hasattr(signal, "SIGHUP") or threading.current_thread() is not threading.main_thread():
+            return
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, self.reload)
+        except (NotImplementedError, RuntimeError, ValueError):
+            # An event loop without signal support; the .env watcher still picks up changes.
+            pass
+
+    def snapshot(self) -> dict:
+        return {"version": self._current.version, "path": str(self.path), "last_error": self.last_error}
+
+
+settings_store = SettingsStore()
+
+
+def get_settings() -> Settings:
+    return settings_store.current
@@ -0,0 +1,79 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class _Flight(Generic[T]):
+    def __init__(self, task: "asyncio.Task[T]"):
+        self.task = task
+        self.waiters = 1
+        self.finished_at: Optional[float] = None
+
+
+class SingleFlight(Generic[T]):
+    def __init__(self, window_seconds: float = 0.05):
+        self.window_seconds = window_seconds
+        self._flights: dict[str, _Flight[T]] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.window_hits = 0
+
+    def _live(self, key: str) -> Optional[_Flight[T]]:
+        flight = self._flights.get(key)
+        if flight is None:
+            return None
+        if flight.finished_at is not None and time.monotonic() - flight.finished_at > self.window_seconds:
+            del self._flights[key]
+            return None
+        return flight
+
+    def _finished(self, key: str, flight: _Flight[T]) -> None:
+        flight.finished_at = time.monotonic()
+        if not flight.task.cancelled():
+            # Mark the outcome as retrieved even if every waiter has gone away.
+            flight.task.exception()
+        if self.window_seconds <= 0:
+            self._flights.pop(key, None)
+            return
+        # Keep the settled result for the collection window so stragglers of the same burst share it.
+        asyncio.get_running_loop().call_later(self.window_seconds, self._expire, key, flight)
+
+    def _expire(self, key: str, flight: _Flight[T]) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def join(self, key: str) -> Optional["asyncio.Task[T]"]:
+        flight = self._live(key)
+        if flight is None:
+            return None
+        flight.waiters += 1
+        if flight.finished_at is None:
+            self.coalesced += 1
+        else:
+            self.window_hits += 1
+        return flight.task
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self.join(key)
+        if task is None:
+            self.leaders += 1
+            # The call runs in its own task so a disconnecting leader does not cancel it for followers.
+            task = asyncio.create_task(fn())
+            flight = _Flight(task)
+            self._flights[key] = flight
+            task.add_done_callback(lambda _: self._finished(key, flight))
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        shared = self.coalesced + self.window_hits
+        total = self.leaders + shared
+        return {
+            "window_ms": round(self.window_seconds * 1000, 1),
+            "in_flight": sum(1 for f in self._flights.values() if f.finished_at is None),
+            "upstream_calls": self.leaders,
+            "coalesced": self.coalesced,
+            "window_hits": self.window_hits,
+            "shared_ratio": round(shared / total, 4) if total else 0.0,
+        }
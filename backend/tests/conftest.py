@@ -0,0 +1,24 @@
+import os
+import tempfile
+
+import pytest
+
+# No real provider keys or background warm-up; set before any app module reads the settings.
+os.environ.update({"GEMINI_API_KEY": "", "OPENROUTER_API_KEY": "", "WARMUP_ENABLED": "false", "RETENTION_DAYS": "0"})
+
+
+def pytest_sessionstart(session):
+    # portfolio.db is relative to the working directory: keep the suite off the working copy's file.
+    os.chdir(tempfile.mkdtemp(prefix="portfolio-tests-"))
+
+
+@pytest.fixture(autouse=True)
+def provider_state(monkeypatch):
+    # Breakers, lanes and missing-model marks are module globals: give every test fresh ones.
+    import providers
+    from circuit_breaker import BreakerRegistry
+    from scheduler import AdmissionScheduler
+
+    monkeypatch.setattr(providers, "breakers", BreakerRegistry())
+    monkeypatch.setattr(providers, "admission", AdmissionScheduler())
+    monkeypatch.setattr(providers, "model_availability", providers.ModelAvailability())
@@ -0,0 +1,67 @@
+import asyncio
+
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+
+import main
+from database import Base
+from models import ChatMessage
+from persistence import ChatWriter
+from schemas import BatchChatRequest
+from tracing import RequestTrace
+
+
+def test_streamed_batch_saves_answers_before_the_client_leaves(monkeypatch):
+    async def answers(questions, profile, concurrency):
+        for i, question in enumerate(questions):
+            yield i, f"answer to {question}", "test-model", RequestTrace()
+
+    recorded = []
+
+    async def record(*messages, events=()):
+        recorded.append([(message.role, message.content) for message in messages])
+
+    monkeypatch.setattr(main, "answer_resume_batch", answers)
+    monkeypatch.setattr(main.chat_writer, "record", record)
+    payload = BatchChatRequest(questions=["q1", "q2", "q3"], stream=True)
+
+    async def read_first_line_then_disconnect():
+        response = await main.chat_batch(payload)
+        body = response.body_iterator
+        first = await anext(body)
+        await body.aclose()
+        return first
+
+    first = asyncio.run(read_first_line_then_disconnect())
+    assert '"index":0' in first
+    assert recorded == [[("user", "q1"), ("assistant", "answer to q1")]]
+
+
+def test_unstreamed_batch_is_saved_in_one_transaction(monkeypatch, tmp_path):
+    async def answers(questions, profile, concurrency):
+        # Completion order differs from request order.
+        for i in reversed(range(len(questions))):
+            yield i, f"answer to {questions[i]}", "test-model", RequestTrace()
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'batch.db'}")
+    Base.metadata.create_all(engine)
+    sessions = sessionmaker(bind=engine)
+    commits = []
+    event.listen(engine, "commit", lambda conn: commits.append(conn))
+    monkeypatch.setattr(main, "answer_resume_batch", answers)
+    monkeypatch.setattr(main, "chat_writer", ChatWriter(sessions))
+
+    response = asyncio.run(main.chat_batch(BatchChatRequest(questions=["q1", "q2", "q3"], session_id="b")))
+
+    assert [item.index for item in response.results] == [0, 1, 2]
+    assert len(commits) == 1
+    with sessions() as db:
+        rows = db.execute(select(ChatMessage.role, ChatMessage.content).order_by(ChatMessage.id)).all()
+    assert [tuple(row) for row in rows] == [
+        ("user", "q1"),
+        ("assistant", "answer to q1"),
+        ("user", "q2"),
+        ("assistant", "answer to q2"),
+        ("user", "q3"),
+        ("assistant", "answer to q3"),
+    ]
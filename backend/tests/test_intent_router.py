@@ -0,0 +1,63 @@
+import pytest
+
+from intent_router import INTENT_RULES, IntentRouter, route_intent
+
+
+@pytest.mark.parametrize(
+    "question, intent",
+    [
+        ("how old is he", "age"),
+        ("give me contact details", "contact"),
+        ("why should we hire him", "why_hire"),
+        ("tell me about yourself", "intro"),
+        ("projects in 30 seconds", "projects_pitch"),
+        ("what are his backend strengths", "backend_strengths"),
+        ("frontend strength?", "frontend_strengths"),
+        ("list his technical skills and major projects", "skills_projects"),
+        ("how are his communication skills", "softskills"),
+        ("which technologies is he strongest in", "technology"),
+        ("what's his tech stack", "technology"),
+        ("what kind of backend work has he done", "backend"),
+        ("what projects has he made", "project"),
+        ("give github url", "github"),
+        ("what is his education background", None),
+        ("hello", None),
+    ],
+)
+def test_routes(question, intent):
+    assert route_intent(question) == intent
+
+
+@pytest.mark.parametrize(
+    "question",
+    ["is he working on backend", "he worked with express?", "what is he building on the backend"],
+)
+def test_inflected_forms_match_their_stem(question):
+    assert route_intent(question) == "backend"
+
+
+@pytest.mark.parametrize(
+    "question, intent",
+    [
+        # Earlier rules win when several match.
+        ("how old is he and what is his email", "age"),
+        ("contact details and why should we hire him", "contact"),
+        ("tell me about yourself and your projects in 30 seconds", "intro"),
+        ("backend strengths and backend experience", "backend_strengths"),
+        ("his skills and projects on github", "skills_projects"),
+        ("which backend project has he built", "backend"),
+        ("what project is on his github profile", "project"),
+    ],
+)
+def test_rule_order_is_priority(question, intent):
+    assert route_intent(question) == intent
+
+
+def test_whole_words_only():
+    # "age" inside "languages" or "agents" is not the age intent.
+    assert route_intent("what languages does he know") == "technology"
+    assert route_intent("does he have experience with AI agents") is None
+
+
+def test_router_lists_intents_in_rule_order():
+    assert IntentRouter().intents == tuple(name for name, _ in INTENT_RULES)
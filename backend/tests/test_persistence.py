@@ -0,0 +1,67 @@
+import asyncio
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models import ChatMessage
+from persistence import ChatWriter, WriterOptions
+
+
+class FlakySessions:
+    def __init__(self, factory, failures: int):
+        self.factory = factory
+        self.failures = failures
+
+    def __call__(self):
+        session = self.factory()
+        if self.failures:
+            self.failures -= 1
+
+            def fail():
+                session.flush()
+                raise OperationalError("COMMIT", {}, Exception("database is locked"))
+
+            session.commit = fail
+        return session
+
+
+def _sessions(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'chat.db'}")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)
+
+
+def _write(writer: ChatWriter, count: int) -> None:
+    async def run():
+        await writer.start(WriterOptions(flush_ms=5, retries=2, retry_backoff_ms=1))
+        for i in range(count):
+            await writer.record(ChatMessage(role="user", content=f"question {i}", session_id="s"))
+        await writer.stop()
+
+    asyncio.run(run())
+
+
+def _rows(sessions) -> int:
+    with sessions() as db:
+        return db.scalar(select(func.count(ChatMessage.id)))
+
+
+def test_failed_batch_is_retried(tmp_path):
+    sessions = _sessions(tmp_path)
+    writer = ChatWriter(FlakySessions(sessions, failures=2))
+    _write(writer, 3)
+    assert _rows(sessions) == 3
+    assert writer.retried_batches == 2
+    assert writer.stats()["dropped_rows"] == 0
+
+
+def test_rows_are_dropped_and_counted_after_the_last_retry(tmp_path, caplog):
+    sessions = _sessions(tmp_path)
+    writer = ChatWriter(FlakySessions(sessions, failures=100))
+    _write(writer, 3)
+    assert _rows(sessions) == 0
+    assert writer.failed_batches >= 1
+    assert writer.dropped_rows == 3
+    assert "dropped" in caplog.text
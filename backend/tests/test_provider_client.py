@@ -0,0 +1,80 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import providers
+from settings import Settings
+
+
+def _gemini_reply(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={"candidates": [{"content": {"parts": [{"text": "pong"}]}}]})
+
+
+class _GeminiHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps the connection open between requests, like the real providers.
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.peers.append(self.client_address)
+        body = json.dumps({"candidates": [{"content": {"parts": [{"text": "pong"}]}}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def gemini_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _GeminiHandler)
+    server.peers = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_provider_calls_reuse_one_connection(gemini_server):
+    host, port = gemini_server.server_address
+    settings = Settings(
+        gemini_api_key="k", gemini_rpm=0, openrouter_api_key="", gemini_base_url=f"http://{host}:{port}/v1beta"
+    )
+
+    async def run():
+        client = await providers.open_provider_client()
+        try:
+            answers = [await providers.ask_providers(settings, "system", f"question {i}") for i in range(5)]
+            assert providers.get_provider_client() is client
+            return answers
+        finally:
+            await providers.close_provider_client()
+
+    answers = asyncio.run(run())
+    assert [answer for answer, _ in answers] == ["pong"] * 5
+    # Every request arrived over the same TCP connection (same client port).
+    assert len(gemini_server.peers) == 5
+    assert len(set(gemini_server.peers)) == 1
+
+
+def test_lifespan_opens_and_closes_the_client(monkeypatch):
+    import main
+
+    monkeypatch.setattr(
+        main, "provider_client_options", lambda: {"transport": httpx.MockTransport(_gemini_reply)}
+    )
+    with TestClient(main.app) as client:
+        assert client.get("/health").status_code == 200
+        opened = providers._client
+        assert opened is not None and not opened.is_closed
+    assert opened.is_closed
+    assert providers._client is None
@@ -0,0 +1,88 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import providers
+from circuit_breaker import CircuitBreaker
+from scheduler import LaneOptions, SchedulerOptions
+from settings import Settings
+
+
+def _sse(*chunks: str) -> bytes:
+    return "".join(f"data: {chunk}\n\n" for chunk in chunks).encode()
+
+
+def _stream(settings: Settings, handler) -> list[tuple[str, str]]:
+    async def run():
+        await providers.open_provider_client(transport=httpx.MockTransport(handler))
+        try:
+            return [item async for item in providers.stream_providers(settings, "system", "question")]
+        finally:
+            await providers.close_provider_client()
+
+    return asyncio.run(run())
+
+
+def test_malformed_chunk_falls_back_to_next_model():
+    good = json.dumps({"candidates": [{"content": {"parts": [{"text": "hello"}]}}]})
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if "garbled-model" in request.url.path:
+            return httpx.Response(200, content=_sse("{not json"))
+        return httpx.Response(200, content=_sse(good, "[DONE]"))
+
+    settings = Settings(gemini_api_key="k", gemini_model="garbled-model", gemini_rpm=0, openrouter_api_key="")
+    items = _stream(settings, handler)
+    assert [delta for _, delta in items] == ["hello"]
+    assert items[0][0] != "garbled-model"
+
+
+def test_stream_times_out_waiting_for_first_chunk(monkeypatch):
+    async def stream(settings, model, payload):
+        if model == "hung-model":
+            await asyncio.sleep(60)
+        yield "fast"
+
+    monkeypatch.setattr(providers, "_stream_gemini", stream)
+    monkeypatch.setattr(CircuitBreaker, "timeout", lambda self: 0.2)
+    settings = Settings(gemini_api_key="k", gemini_model="hung-model", gemini_rpm=0, openrouter_api_key="")
+
+    async def run():
+        return [item async for item in providers.stream_providers(settings, "system", "question")]
+
+    items = asyncio.run(asyncio.wait_for(run(), 5))
+    assert [delta for _, delta in items] == ["fast"]
+    assert items[0][0] != "hung-model"
+
+
+def test_open_circuit_does_not_spend_admission_tokens():
+    providers.admission.configure(SchedulerOptions(), {"gemini": LaneOptions(60)})
+    breaker = providers.breakers.get("gemini", "broken-model")
+    for _ in range(breaker.options.min_requests):
+        breaker.record_failure()
+    lane = providers._lane("gemini", "open-circuit-key")
+    candidate = providers.ProviderCandidate("gemini", "broken-model", None, None, lane)
+
+    with pytest.raises(providers.ProviderError, match="Circuit open"):
+        asyncio.run(providers._guarded_call(candidate))
+    assert lane not in providers.admission._lanes
+
+
+def test_empty_stream_counts_against_the_circuit(monkeypatch):
+    async def stream(settings, model, payload):
+        if model == "empty-model":
+            return
+        yield "answer"
+
+    monkeypatch.setattr(providers, "_stream_gemini", stream)
+    settings = Settings(gemini_api_key="k", gemini_model="empty-model", gemini_rpm=0, openrouter_api_key="")
+    breaker = providers.breakers.get("gemini", "empty-model")
+
+    async def run():
+        return [item async for item in providers.stream_providers(settings, "system", "question")]
+
+    for _ in range(breaker.options.min_requests):
+        assert [delta for _, delta in asyncio.run(run())] == ["answer"]
+    assert breaker.snapshot()["state"] == "open"
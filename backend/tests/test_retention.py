@@ -0,0 +1,37 @@
+import sqlite3
+
+from sqlalchemy import create_engine
+
+import retention
+from retention import RetentionJob, RetentionOptions
+
+
+def _legacy_database(path) -> None:
+    # A file created before incremental auto-vacuum, with free pages left by a large delete.
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE filler (payload TEXT)")
+        conn.executemany("INSERT INTO filler VALUES (?)", [("x" * 2000,) for _ in range(200)])
+        conn.execute("DELETE FROM filler")
+
+
+def test_vacuum_is_off_while_retention_is_disabled(monkeypatch):
+    called = []
+    monkeypatch.setattr(retention, "vacuum", lambda *args: called.append(args))
+    result = RetentionJob().run_once(RetentionOptions(retention_days=0, vacuum_pages=2000))
+    assert "vacuum" not in result and "archived" not in result
+    assert called == []
+
+
+def test_full_vacuum_conversion_is_opt_in(tmp_path, monkeypatch):
+    path = tmp_path / "legacy.db"
+    _legacy_database(path)
+    monkeypatch.setattr(retention, "engine", create_engine(f"sqlite:///{path}"))
+
+    skipped = retention.vacuum(2000)
+    assert skipped["full_vacuum"] is False
+    assert skipped["free_pages_after"] == skipped["free_pages_before"] > 0
+
+    converted = retention.vacuum(2000, convert=True)
+    assert converted["full_vacuum"] is True
+    assert converted["auto_vacuum"] == "incremental"
+    assert converted["free_pages_after"] == 0
@@ -0,0 +1,47 @@
+import asyncio
+
+from scheduler import AdmissionScheduler, LaneOptions, SchedulerOptions, TokenBucket
+
+LANE = "gemini:abcd1234"
+
+
+def _configure(scheduler: AdmissionScheduler, rpm: float) -> None:
+    scheduler.configure(SchedulerOptions(max_wait_seconds=120), {"gemini": LaneOptions(rpm, burst=1)})
+
+
+def test_zero_rate_bucket_never_waits():
+    bucket = TokenBucket(0, 1)
+    assert all(bucket.take() for _ in range(10))
+    assert bucket.wait_time() == 0.0
+
+
+def test_reconfiguring_a_lane_to_zero_rpm_disables_it():
+    scheduler = AdmissionScheduler()
+
+    async def run():
+        _configure(scheduler, 1)
+        await scheduler.acquire(LANE)
+        # The bucket is empty, so this caller queues behind the 60s refill.
+        waiter = asyncio.create_task(scheduler.acquire(LANE))
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+
+        _configure(scheduler, 0)
+        await asyncio.wait_for(waiter, 1)
+        assert scheduler.snapshot() == []
+        for _ in range(5):
+            await asyncio.wait_for(scheduler.acquire(LANE), 1)
+        scheduler.penalize(LANE, None)
+
+    asyncio.run(run())
+
+
+def test_penalize_on_a_zero_rate_lane_does_not_divide_by_zero():
+    scheduler = AdmissionScheduler()
+    _configure(scheduler, 1)
+    asyncio.run(scheduler.acquire(LANE))
+    lane = scheduler._lanes[LANE]
+    lane.options = LaneOptions(0)
+    lane.bucket = TokenBucket(0, 1)
+    scheduler.penalize(LANE, None)
+    assert scheduler.snapshot()[0]["next_token_in_ms"] > 0
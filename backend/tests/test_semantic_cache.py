@@ -0,0 +1,61 @@
+import pytest
+
+from semantic_cache import SemanticCache
+
+
+def test_namespaces_do_not_evict_each_other():
+    cache = SemanticCache(capacity=8, threshold=0.9)
+    cache.store("what is his tech stack", "React and FastAPI", "model-a", "profile-a")
+    cache.store("what is his tech stack", "Go and Postgres", "model-b", "profile-b")
+
+    assert cache.lookup("what is his tech stack?", "profile-a")[0] == "React and FastAPI"
+    assert cache.lookup("what is his tech stack?", "profile-b")[0] == "Go and Postgres"
+    assert cache.lookup("what is his tech stack?", "profile-c") is None
+    assert cache.snapshot()["namespaces"] == 2
+
+
+def test_full_cache_evicts_least_recently_used_entry():
+    cache = SemanticCache(capacity=2, threshold=0.9)
+    cache.store("where is he located", "Pune", "m", "old-resume")
+    cache.store("where is he located", "Bangalore", "m", "new-resume")
+    assert cache.lookup("where is he located", "new-resume")[0] == "Bangalore"
+    cache.store("what is his education", "B.Tech", "m", "new-resume")
+
+    assert cache.lookup("where is he located", "old-resume") is None
+    assert cache.lookup("where is he located", "new-resume")[0] == "Bangalore"
+    assert cache.snapshot()["evictions"] == 1
+
+
+def test_storing_the_same_question_replaces_its_entry():
+    cache = SemanticCache(capacity=4, threshold=0.9)
+    cache.store("where is he located", "Pune", "m", "ns")
+    cache.store("Where is he located?", "Bangalore", "m", "ns")
+
+    assert cache.lookup("where is he located", "ns")[0] == "Bangalore"
+    assert cache.snapshot()["size"] == 1
+
+
+def test_expired_best_match_does_not_hide_a_fresh_one(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("semantic_cache.time.monotonic", lambda: clock[0])
+    cache = SemanticCache(capacity=4, threshold=0.8, ttl_seconds=60)
+    cache.store("what is his tech stack", "old answer", "m", "ns")
+    clock[0] += 50
+    cache.store("what is his tech stack today", "fresh answer", "m", "ns")
+    clock[0] += 20
+
+    hit = cache.lookup("what is his tech stack", "ns")
+    assert hit is not None and hit[0] == "fresh answer"
+    assert cache.snapshot()["size"] == 1
+
+
+def test_zero_capacity_is_rejected():
+    with pytest.raises(ValueError):
+        SemanticCache(capacity=0)
+
+
+def test_zero_size_setting_disables_the_cache():
+    from ai_service import _get_semantic_cache
+    from settings import Settings
+
+    assert _get_semantic_cache(Settings(semantic_cache_size=0)) is None
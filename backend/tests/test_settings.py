@@ -0,0 +1,62 @@
+import asyncio
+import threading
+from dataclasses import replace
+
+import pytest
+
+from settings import Settings, SettingsStore
+
+
+def _uvloop_factory():
+    uvloop = pytest.importorskip("uvloop")
+    return uvloop.new_event_loop
+
+
+@pytest.mark.parametrize("loop_factory", [lambda: asyncio.new_event_loop, _uvloop_factory], ids=["asyncio", "uvloop"])
+def test_sighup_handler_is_skipped_off_the_main_thread(tmp_path, loop_factory):
+    store = SettingsStore(tmp_path / ".env")
+    new_loop = loop_factory()
+    errors = []
+
+    async def install():
+        store.install_sighup_handler()
+
+    def run():
+        loop = new_loop()
+        try:
+            loop.run_until_complete(install())
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            loop.close()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+    assert errors == []
+
+
+def test_reload_rejects_negative_values(tmp_path):
+    env = tmp_path / ".env"
+    env.write_text("RESPONSE_CACHE_SIZE=64\n")
+    store = SettingsStore(env)
+    env.write_text("RESPONSE_CACHE_SIZE=-1\nRESPONSE_CACHE_TTL_SECONDS=-5\n")
+
+    assert store.reload().response_cache_size == 64
+    assert "RESPONSE_CACHE_SIZE must not be negative" in store.last_error
+
+    env.write_text("RESPONSE_CACHE_SIZE=0\n")
+    assert store.reload().response_cache_size == 0
+    assert store.last_error is None
+
+
+def test_poll_interval_has_a_floor(tmp_path):
+    env = tmp_path / ".env"
+    env.write_text("SETTINGS_POLL_SECONDS=0\n")
+    assert SettingsStore(env).current.poll_interval == 0.5
+
+
+@pytest.mark.parametrize("field", ["prompt_input_budget_tokens", "prompt_max_output_tokens"])
+def test_prompt_budget_changes_the_answer_fingerprint(field):
+    base = Settings()
+    assert replace(base, **{field: getattr(base, field) + 100}).answer_fingerprint != base.answer_fingerprint
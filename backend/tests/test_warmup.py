@@ -0,0 +1,39 @@
+import asyncio
+
+import ai_service
+from ai_service import warm_answers
+
+
+def test_warm_up_skips_the_semantic_cache(monkeypatch):
+    calls = []
+
+    async def ask(settings, system_prompt, user_prompt, max_tokens=900):
+        calls.append(user_prompt)
+        return ("computed by the model", "test-model")
+
+    class Lookups:
+        def lookup(self, question, namespace):
+            raise AssertionError("warm-up must not read the semantic cache")
+
+        def store(self, question, answer, model, namespace):
+            pass
+
+    stored = {}
+    monkeypatch.setattr(ai_service, "ask_providers", ask)
+    monkeypatch.setattr(ai_service, "_get_semantic_cache", lambda settings: Lookups())
+    monkeypatch.setattr(ai_service.precomputed_answers, "load", lambda digest, version: 0)
+    monkeypatch.setattr(ai_service.precomputed_answers, "contains", lambda question, digest, version: False)
+    monkeypatch.setattr(ai_service.precomputed_answers, "prune", lambda digest, version: 0)
+    monkeypatch.setattr(
+        ai_service.precomputed_answers,
+        "store",
+        lambda digest, version, question, answer, model: stored.__setitem__(question, (answer, model)),
+    )
+
+    result = asyncio.run(warm_answers(["how old is he", "what does he do for fun on weekends"]))
+
+    assert result["computed"] == 2 and result["failed"] == 0
+    # Intent parsers still answer what they can; the rest goes straight to the provider.
+    assert stored["how old is he"][1] != "test-model"
+    assert stored["what does he do for fun on weekends"] == ("computed by the model", "test-model")
+    assert len(calls) == 1
@@ -0,0 +1,58 @@
+import contextvars
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+
+@dataclass
+class RequestTrace:
+    question_kind: Optional[str] = None
+    max_tokens: Optional[int] = None
+    context_tokens_before: Optional[int] = None
+    context_tokens_after: Optional[int] = None
+    prompt_tokens_estimate: Optional[int] = None
+    # Reported by the provider when the response includes usage data.
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    # The model string returned to the client, used as the metrics label.
+    model: Optional[str] = None
+    stages: dict[str, float] = field(default_factory=dict)
+
+    def record_usage(self, prompt_tokens: Optional[int], completion_tokens: Optional[int]) -> None:
+        if prompt_tokens is not None:
+            self.prompt_tokens = prompt_tokens
+        if completion_tokens is not None:
+            self.completion_tokens = completion_tokens
+
+
+_current: contextvars.ContextVar[Optional[RequestTrace]] = contextvars.ContextVar("request_trace", default=None)
+
+
+@contextmanager
+def request_trace() -> Iterator[RequestTrace]:
+    trace = RequestTrace()
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    # Tasks copy the context when created, so hedged and coalesced calls still reach the same trace object.
+    return _current.get()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        # Accumulate, so a stage entered twice (e.g. two cache tiers) reports its total.
+        trace.stages[name] = trace.stages.get(name, 0.0) + time.perf_counter() - started
@@ -0,0 +1,79 @@
+import asyncio
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from ai_service import precomputed_namespace, warm_answers
+from settings import Settings, get_settings
+
+
+def load_faq(path: Path) -> List[str]:
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        return []
+    return [line.strip() for line in lines if line.strip() and not line.lstrip().startswith("#")]
+
+
+def _faq_path(settings: Settings) -> Path:
+    path = Path(settings.warmup_faq_file)
+    return path if path.is_absolute() else Path(__file__).parent / path
+
+
+class Warmup:
+    def __init__(self):
+        self.runs = 0
+        self.running = False
+        self.last_result: Optional[dict] = None
+        self.last_error: Optional[str] = None
+        self._signature: Optional[tuple] = None
+        self._failed_signature: Optional[tuple] = None
+        self._retry_at = 0.0
+
+    async def maybe_run(self, settings: Settings) -> Optional[dict]:
+        questions = await asyncio.to_thread(load_faq, _faq_path(settings))
+        # Re-warm when the resume, the answer version (model, prompt, settings) or the FAQ list changes.
+        signature = (*precomputed_namespace(), tuple(questions))
+        if signature == self._signature:
+            return None
+        if signature == self._failed_signature and time.monotonic() < self._retry_at:
+            return None
+
+        self.running = True
+        try:
+            result = await warm_answers(questions, settings.warmup_concurrency)
+        finally:
+            self.running = False
+        self.runs += 1
+        self.last_result = {**result, "questions": len(questions), "finished_at": time.time()}
+        if result["failed"]:
+            # Usually a provider outage or quota: keep what was computed and fill the gaps later.
+            self._failed_signature = signature
+            self._retry_at = time.monotonic() + settings.warmup_retry_seconds
+        else:
+            self._signature = signature
+            self._failed_signature = None
+        return result
+
+    async def watch(self) -> None:
+        while True:
+            settings = get_settings()
+            if settings.warmup_enabled:
+                try:
+                    await self.maybe_run(settings)
+                    self.last_error = None
+                except Exception as exc:
+                    self.last_error = str(exc)
+            await asyncio.sleep(settings.poll_interval)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": get_settings().warmup_enabled,
+            "running": self.running,
+            "runs": self.runs,
+            "last_result": self.last_result,
+            "last_error": self.last_error,
+        }
+
+
+warmup = Warmup()